@@ -1,23 +1,52 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, request, jsonify, render_template, stream_with_context
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from flask_bcrypt import Bcrypt
 import os
-import pandas as pd
-import numpy as np
+import threading
+import multiprocessing
 from datetime import datetime, timedelta
 import json
-from models.stock_predictor import StockPredictor
-from models.lstm_model import LSTMModel
-from models.linear_regression_model import LinearRegressionModel
-from utils.data_processor import DataProcessor
-from utils.chart_generator import ChartGenerator
+import base64
+from models.model_registry import ModelRegistry
+from utils.training_queue import TrainingQueue
+from utils.backtest import BacktestQueue, BACKTEST_MODES
+from utils.chart_cache import ChartCache
+from utils.prediction_stats import PredictionStats
+from utils.migrations import migrate
+from utils.backfill import ActualPriceBackfill
+from utils.database import database_uri, engine_options
+from utils.prediction_writer import PredictionWriter
+from utils.lazy import LazyProxy
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///stock_prediction.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = database_uri()
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['MODEL_STORE_PATH'] = os.environ.get('MODEL_STORE_PATH', 'model_store/')
+app.config['MAX_LOADED_MODELS'] = int(os.environ.get('MAX_LOADED_MODELS', 6))
+app.config['TRAINING_WORKERS'] = int(os.environ.get('TRAINING_WORKERS', 2))
+app.config['TRAINING_MAX_EPOCHS'] = int(os.environ.get('TRAINING_MAX_EPOCHS', 200))
+app.config['TRAINING_MAX_SECONDS'] = float(os.environ.get('TRAINING_MAX_SECONDS', 3600))
+app.config['TRAINING_PROCESSES'] = int(os.environ.get('TRAINING_PROCESSES', os.cpu_count() or 1))
+app.config['BACKTEST_PROCESSES'] = int(os.environ.get('BACKTEST_PROCESSES', os.cpu_count() or 1))
+app.config['PRICE_STORE_POLL_SECONDS'] = float(os.environ.get('PRICE_STORE_POLL_SECONDS', 5))
+app.config['MAX_BATCH_ITEMS'] = int(os.environ.get('MAX_BATCH_ITEMS', 50))
+app.config['PREWARM'] = os.environ.get('PREWARM', 'off').lower()
+app.config['CHART_CACHE_MAX_BYTES'] = int(os.environ.get('CHART_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+app.config['CHART_MAX_POINTS'] = int(os.environ.get('CHART_MAX_POINTS', 1000))
+app.config['CHART_MAX_POINTS_LIMIT'] = int(os.environ.get('CHART_MAX_POINTS_LIMIT', 5000))
+app.config['PAGE_SIZE'] = int(os.environ.get('PAGE_SIZE', 100))
+app.config['MAX_PAGE_SIZE'] = int(os.environ.get('MAX_PAGE_SIZE', 1000))
+app.config['BACKFILL_INTERVAL_SECONDS'] = float(os.environ.get('BACKFILL_INTERVAL_SECONDS', 3600))
+app.config['PREDICTION_WRITE_BEHIND'] = os.environ.get('PREDICTION_WRITE_BEHIND', 'on').lower() != 'off'
+app.config['PREDICTION_BATCH_SIZE'] = int(os.environ.get('PREDICTION_BATCH_SIZE', 200))
+app.config['PREDICTION_FLUSH_MS'] = int(os.environ.get('PREDICTION_FLUSH_MS', 50))
+app.config['PREDICTION_QUEUE_MAX'] = int(os.environ.get('PREDICTION_QUEUE_MAX', 10000))
+app.config['PREDICTION_QUEUE_TIMEOUT'] = float(os.environ.get('PREDICTION_QUEUE_TIMEOUT', 5))
+app.config['PREDICTION_JOURNAL'] = os.environ.get('PREDICTION_JOURNAL', 'prediction_journal.jsonl')
 
 # Initialize extensions
 db = SQLAlchemy(app)
@@ -39,6 +68,15 @@ class User(UserMixin, db.Model):
     predictions = db.relationship('Prediction', backref='user', lazy=True)
 
 class Prediction(db.Model):
+    # Indexes for the history and admin listings (keyset order), symbol lookups
+    # and scans for predictions still waiting for their actual price
+    __table_args__ = (
+        db.Index('ix_prediction_user_date', 'user_id', 'prediction_date', 'id'),
+        db.Index('ix_prediction_date', 'prediction_date', 'id'),
+        db.Index('ix_prediction_symbol_date', 'stock_symbol', 'prediction_date'),
+        db.Index('ix_prediction_actual_price', 'actual_price'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     stock_symbol = db.Column(db.String(10), nullable=False)
@@ -48,20 +86,454 @@ class Prediction(db.Model):
     model_used = db.Column(db.String(50), nullable=False)
     confidence_score = db.Column(db.Float)
 
+class PredictionSummary(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    prediction_count = db.Column(db.Integer, nullable=False, default=0)
+    resolved_count = db.Column(db.Integer, nullable=False, default=0)
+    error_sum = db.Column(db.Float, nullable=False, default=0.0)
+
+class ModelAccuracy(db.Model):
+    stock_symbol = db.Column(db.String(10), primary_key=True)
+    model_used = db.Column(db.String(50), primary_key=True)
+    resolved_count = db.Column(db.Integer, nullable=False, default=0)
+    error_sum = db.Column(db.Float, nullable=False, default=0.0)
+
+class TrainingJob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    stock_symbol = db.Column(db.String(10), nullable=False)
+    model_type = db.Column(db.String(50), nullable=False)
+    data_version = db.Column(db.String(64), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    error = db.Column(db.Text)
+    metrics = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+class BacktestRun(db.Model):
+    __table_args__ = (
+        db.Index('ix_backtest_run_symbol', 'stock_symbol', 'model_type', 'created_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    stock_symbol = db.Column(db.String(10), nullable=False)
+    model_type = db.Column(db.String(50), nullable=False)
+    data_version = db.Column(db.String(64), nullable=False)
+    params = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    error = db.Column(db.Text)
+    metrics = db.Column(db.Text)
+    folds = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
 @login_manager.user_loader
 def load_user(user_id):
     return User.query.get(int(user_id))
 
 # Initialize ML models
-stock_predictor = StockPredictor()
-lstm_model = LSTMModel()
-linear_model = LinearRegressionModel()
-data_processor = DataProcessor()
-chart_generator = ChartGenerator()
+# Services that import pandas, plotly or scikit-learn are built on first use so the
+# auth and history endpoints come up without loading the ML stack
+def create_price_store():
+    from utils.price_store import PriceStore
+    store = PriceStore('data/')
+    # New bars resolve the predictions that were waiting for them
+    store.add_listener(actual_price_backfill.notify)
+    store.start_watcher(app.config['PRICE_STORE_POLL_SECONDS'])
+    actual_price_backfill.start(app.config['BACKFILL_INTERVAL_SECONDS'])
+    return store
+
+def create_chart_generator():
+    from utils.chart_generator import ChartGenerator
+    return ChartGenerator()
+
+def create_data_processor():
+    from utils.data_processor import DataProcessor
+    return DataProcessor()
+
+def create_indicator_engine():
+    from utils.indicators import IndicatorEngine
+    return IndicatorEngine()
+
+model_registry = ModelRegistry(app.config['MODEL_STORE_PATH'], app.config['MAX_LOADED_MODELS'])
+data_processor = LazyProxy(create_data_processor)
+chart_generator = LazyProxy(create_chart_generator)
+price_store = LazyProxy(create_price_store)
+indicator_engine = LazyProxy(create_indicator_engine)
+chart_cache = ChartCache(app.config['CHART_CACHE_MAX_BYTES'])
+
+def load_price_frame(stock_symbol):
+    """Return the shared read-only price DataFrame for a symbol"""
+    series = price_store.get(stock_symbol)
+    if series is None:
+        raise FileNotFoundError(f"Data file for {stock_symbol} not found")
+    return series.frame
+
+training_queue = TrainingQueue(app, db, TrainingJob, model_registry, load_price_frame,
+                               max_workers=app.config['TRAINING_WORKERS'])
+backtest_queue = BacktestQueue(app, db, BacktestRun, load_price_frame, processes=app.config['BACKTEST_PROCESSES'])
+prediction_stats = PredictionStats(db, Prediction, PredictionSummary, ModelAccuracy)
+actual_price_backfill = ActualPriceBackfill(app, db, Prediction, prediction_stats, price_store)
+prediction_writer = PredictionWriter(app, db, Prediction, prediction_stats,
+                                     batch_size=app.config['PREDICTION_BATCH_SIZE'],
+                                     flush_interval=app.config['PREDICTION_FLUSH_MS'] / 1000,
+                                     write_behind=app.config['PREDICTION_WRITE_BEHIND'],
+                                     max_pending=app.config['PREDICTION_QUEUE_MAX'],
+                                     block_timeout=app.config['PREDICTION_QUEUE_TIMEOUT'],
+                                     journal_path=app.config['PREDICTION_JOURNAL'] or None)
+
+def prediction_row(stock_symbol, model_type, prediction):
+    """Column values of a Prediction row for the current user"""
+    return {
+        'user_id': current_user.id,
+        'stock_symbol': stock_symbol,
+        'predicted_price': prediction['predicted_price'],
+        'prediction_date': datetime.utcnow(),
+        'model_used': model_type,
+        'confidence_score': prediction.get('confidence', 0.8)
+    }
+
+def prewarm(load_models=False):
+    """Build the lazy services ahead of the first request
+    
+    With load_models, the persisted models for every symbol's current data are
+    loaded too, up to the registry's in-memory limit.
+    """
+    from models.model_registry import model_class
+    
+    chart_generator.resolve()
+    indicator_engine.resolve()
+    symbols = price_store.load_all()
+    for model_type in ('linear', 'lstm'):
+        model_class(model_type)
+    
+    if load_models:
+        for stock_symbol in symbols:
+            series = price_store.get(stock_symbol)
+            for model_type in ('linear', 'lstm'):
+                model_registry.get(stock_symbol, model_type, series.version)
+
+def start_prewarm(mode):
+    """Run prewarm in a background thread for PREWARM=imports or PREWARM=models"""
+    if mode not in ('imports', 'models'):
+        return None
+    
+    def run():
+        try:
+            prewarm(load_models=mode == 'models')
+        except Exception as e:
+            print(f"Warning: prewarm failed: {e}")
+    
+    thread = threading.Thread(target=run, name='prewarm', daemon=True)
+    thread.start()
+    return thread
+
+# Spawned pool workers (bulk training, backtests) re-import this module as their
+# main module when the server runs as python app.py; they serve nothing, so skip it
+if multiprocessing.parent_process() is None:
+    start_prewarm(app.config['PREWARM'])
+
+def serialize_job(job):
+    """Convert a TrainingJob row into an API response dict"""
+    return {
+        'job_id': job.id,
+        'stock_symbol': job.stock_symbol,
+        'model_type': job.model_type,
+        'status': job.status,
+        'error': job.error,
+        'metrics': json.loads(job.metrics) if job.metrics else None,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None
+    }
+
+def serialize_backtest(run):
+    """Convert a BacktestRun row into an API response dict"""
+    return {
+        'backtest_id': run.id,
+        'stock_symbol': run.stock_symbol,
+        'model_type': run.model_type,
+        'data_version': run.data_version,
+        'params': json.loads(run.params),
+        'status': run.status,
+        'error': run.error,
+        'metrics': json.loads(run.metrics) if run.metrics else None,
+        'folds': json.loads(run.folds) if run.folds else None,
+        'created_at': run.created_at.isoformat() if run.created_at else None,
+        'finished_at': run.finished_at.isoformat() if run.finished_at else None
+    }
+
+def training_budget(data, model_type):
+    """LSTM training budget from a request body: max_epochs and max_seconds
+    
+    Both are capped by TRAINING_MAX_EPOCHS and TRAINING_MAX_SECONDS, and the
+    wall-clock cap applies when none is given. The linear model trains in well
+    under a second and takes no budget.
+    """
+    if model_type != 'lstm':
+        return {}
+    try:
+        epochs = int(data.get('max_epochs', 50))
+        max_seconds = float(data.get('max_seconds', app.config['TRAINING_MAX_SECONDS']))
+    except (TypeError, ValueError):
+        raise ValueError("max_epochs and max_seconds must be numbers")
+    if not 1 <= epochs <= app.config['TRAINING_MAX_EPOCHS']:
+        raise ValueError(f"max_epochs must be between 1 and {app.config['TRAINING_MAX_EPOCHS']}")
+    if not 0 < max_seconds <= app.config['TRAINING_MAX_SECONDS']:
+        raise ValueError(f"max_seconds must be between 0 and {app.config['TRAINING_MAX_SECONDS']:g}")
+    return {'epochs': epochs, 'max_seconds': max_seconds}
+
+def run_prediction(stock_symbol, model_type, series, horizon=1):
+    """Predict with the ready model for a symbol over horizon days
+
+    Returns (prediction, None), or (None, job) when the model is not trained yet
+    and a training job has been queued for it.
+    """
+    from utils.indicators import technical_summary
+    
+    registry_type = ModelRegistry.normalize_model_type(model_type)
+    
+    # Use the model trained on this symbol's current data; queue training if it is missing
+    model = model_registry.get(stock_symbol, registry_type, series.version)
+    if model is None:
+        job = training_queue.submit(stock_symbol, registry_type, series.version, user_id=current_user.id)
+        return None, job
+    
+    # Indicators come from running per-symbol state instead of full rolling recomputes
+    indicator_values = indicator_engine.latest(stock_symbol, series.close, series.volume)
+    technical_indicators = technical_summary(indicator_values, series.close[-1])
+    
+    prediction = model.predict(series.frame, technical_indicators=technical_indicators, horizon=horizon)
+    return prediction, None
+
+# Charts rendered from a symbol's price data, by URL name and response key
+CHART_KEYS = {
+    'line': 'line_chart',
+    'candlestick': 'candlestick_chart',
+    'pie': 'pie_chart',
+    'technical': 'technical_indicators_chart',
+    'volume': 'volume_chart',
+    'statistics': 'statistics_dashboard'
+}
+DEFAULT_CHARTS = ('line', 'candlestick', 'pie')
+
+def indicator_frame(series):
+    """Price frame with technical indicator columns, computed once per data version"""
+    return series.cached('indicator_frame',
+                         lambda: data_processor.add_technical_indicators(series.frame.copy()))
+
+def render_chart(chart_type, series, max_points, resolution):
+    """Build the encoded JSON of one chart for a symbol's current data"""
+    stock_symbol = series.stock_symbol
+    if chart_type == 'line':
+        return chart_generator.create_line_chart(series.frame, stock_symbol, max_points=max_points)
+    if chart_type == 'candlestick':
+        return chart_generator.create_candlestick_chart(series.frame, stock_symbol, resolution=resolution,
+                                                        max_points=max_points)
+    if chart_type == 'pie':
+        return chart_generator.create_pie_chart(series.frame, stock_symbol)
+    if chart_type == 'technical':
+        return chart_generator.create_technical_indicators_chart(indicator_frame(series), stock_symbol,
+                                                                 max_points=max_points)
+    if chart_type == 'volume':
+        return chart_generator.create_volume_chart(series.frame, stock_symbol, resolution=resolution,
+                                                   max_points=max_points)
+    return chart_generator.create_statistics_dashboard(series.frame, stock_symbol)
+
+def chart_entry(chart_type, series, max_points, resolution):
+    """Cached (etag, body) of one chart, rendered only on a cache miss"""
+    # Key only on the options a chart uses, so e.g. one pie chart serves every max_points
+    params = {}
+    if chart_type in ('line', 'candlestick', 'technical', 'volume'):
+        params['max_points'] = max_points
+    if chart_type in ('candlestick', 'volume'):
+        params['resolution'] = resolution
+    
+    key = ChartCache.make_key(series.stock_symbol, chart_type, series.version, **params)
+    entry = chart_cache.get(key)
+    if entry is None:
+        entry = chart_cache.put(key, render_chart(chart_type, series, max_points, resolution))
+    return entry
+
+def chart_response(body, etag=None):
+    """JSON response for encoded chart bytes; with an etag, a matching If-None-Match gets a 304"""
+    response = app.response_class(body, mimetype='application/json')
+    if etag is None:
+        return response
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+def chart_options():
+    """Parse the max_points and resolution query parameters of the chart endpoints"""
+    from utils.downsampling import RESOLUTIONS
+    
+    try:
+        max_points = int(request.args.get('max_points', app.config['CHART_MAX_POINTS']))
+    except ValueError:
+        raise ValueError("max_points must be an integer")
+    if not 3 <= max_points <= app.config['CHART_MAX_POINTS_LIMIT']:
+        raise ValueError(f"max_points must be between 3 and {app.config['CHART_MAX_POINTS_LIMIT']}")
+    
+    resolution = request.args.get('resolution', 'auto')
+    if resolution != 'auto' and resolution not in RESOLUTIONS:
+        raise ValueError(f"resolution must be one of {', '.join(RESOLUTIONS)} or auto")
+    return max_points, resolution
+
+def selected_charts():
+    """Parse the ?charts= selector of the combined chart endpoint"""
+    if 'charts' not in request.args:
+        return DEFAULT_CHARTS
+    selected = [name.strip() for name in request.args['charts'].split(',') if name.strip()]
+    unknown = [name for name in selected if name not in CHART_KEYS]
+    if unknown or not selected:
+        raise ValueError(f"charts must be a comma separated list of {', '.join(CHART_KEYS)}")
+    return selected
+
+# Columns returned by the prediction listings; queries select only these
+PREDICTION_COLUMNS = (Prediction.id, Prediction.stock_symbol, Prediction.predicted_price,
+                      Prediction.actual_price, Prediction.prediction_date, Prediction.model_used,
+                      Prediction.confidence_score)
+
+def encode_cursor(prediction_date, prediction_id):
+    """Opaque cursor pointing just past a row in (prediction_date, id) order"""
+    raw = f"{prediction_date.isoformat()}|{prediction_id}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_cursor(cursor):
+    try:
+        prediction_date, prediction_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|')
+        return datetime.fromisoformat(prediction_date), int(prediction_id)
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid cursor")
+
+def page_predictions(query):
+    """Apply the listing filters and keyset pagination from the query string
+    
+    Supports symbol, model, start_date and end_date (inclusive, YYYY-MM-DD)
+    filters, limit, and the cursor returned as next_cursor by the previous page.
+    Returns (query, limit); the query fetches one extra row to detect a next page.
+    """
+    args = request.args
+    try:
+        limit = int(args.get('limit', app.config['PAGE_SIZE']))
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if not 1 <= limit <= app.config['MAX_PAGE_SIZE']:
+        raise ValueError(f"limit must be between 1 and {app.config['MAX_PAGE_SIZE']}")
+    
+    if args.get('symbol'):
+        query = query.filter(Prediction.stock_symbol == args['symbol'])
+    if args.get('model'):
+        query = query.filter(Prediction.model_used == args['model'])
+    try:
+        if args.get('start_date'):
+            query = query.filter(Prediction.prediction_date >= datetime.fromisoformat(args['start_date']))
+        if args.get('end_date'):
+            end = datetime.fromisoformat(args['end_date']) + timedelta(days=1)
+            query = query.filter(Prediction.prediction_date < end)
+    except ValueError:
+        raise ValueError("start_date and end_date must be YYYY-MM-DD dates")
+    
+    if args.get('cursor'):
+        # Rows strictly after the cursor in descending (prediction_date, id) order
+        cursor_date, cursor_id = decode_cursor(args['cursor'])
+        query = query.filter(db.or_(
+            Prediction.prediction_date < cursor_date,
+            db.and_(Prediction.prediction_date == cursor_date, Prediction.id < cursor_id)
+        ))
+    
+    query = query.order_by(Prediction.prediction_date.desc(), Prediction.id.desc()).limit(limit + 1)
+    return query, limit
+
+def stream_predictions(key, query, limit, serialize, leading=()):
+    """Stream a page of rows as {key: [...], next_cursor: ...} without building the list
+    
+    leading holds (serialized item, cursor) pairs listed ahead of the rows. They
+    count against limit, and the query only fills the rest of the page.
+    """
+    def generate():
+        yield f'{{"{key}":['
+        shown = leading[:limit]
+        for count, (item, cursor) in enumerate(shown):
+            yield (',' if count else '') + json.dumps(item)
+        
+        next_cursor = None
+        if len(leading) > limit:
+            next_cursor = shown[-1][1]
+        else:
+            room = limit - len(shown)
+            last = None
+            for count, row in enumerate(query.yield_per(200)):
+                if count == room:
+                    next_cursor = encode_cursor(last.prediction_date, last.id) if last is not None else shown[-1][1]
+                    break
+                yield (',' if count or shown else '') + json.dumps(serialize(row))
+                last = row
+        yield f'],"next_cursor":{json.dumps(next_cursor)}}}'
+    
+    return app.response_class(stream_with_context(generate()), mimetype='application/json')
+
+def pending_predictions(user_id):
+    """Predictions of user_id still queued in the writer, newest first
+    
+    Applies the same symbol, model, date and cursor filters as page_predictions.
+    Returns plain column dicts.
+    """
+    rows = prediction_writer.pending(user_id)
+    args = request.args
+    if args.get('symbol'):
+        rows = [row for row in rows if row['stock_symbol'] == args['symbol']]
+    if args.get('model'):
+        rows = [row for row in rows if row['model_used'] == args['model']]
+    try:
+        if args.get('start_date'):
+            start = datetime.fromisoformat(args['start_date'])
+            rows = [row for row in rows if row['prediction_date'] >= start]
+        if args.get('end_date'):
+            end = datetime.fromisoformat(args['end_date']) + timedelta(days=1)
+            rows = [row for row in rows if row['prediction_date'] < end]
+    except ValueError:
+        raise ValueError("start_date and end_date must be YYYY-MM-DD dates")
+    if args.get('cursor'):
+        cursor_date, cursor_id = decode_cursor(args['cursor'])
+        rows = [row for row in rows if row['prediction_date'] < cursor_date]
+    return rows[::-1]
+
+def serialize_pending_prediction(row):
+    """Convert a queued prediction into the listing format; it has no id yet"""
+    return {
+        'id': None,
+        'stock_symbol': row['stock_symbol'],
+        'predicted_price': row['predicted_price'],
+        'actual_price': None,
+        'prediction_date': row['prediction_date'].isoformat(),
+        'model_used': row['model_used'],
+        'confidence_score': row['confidence_score'],
+        'pending': True
+    }
+
+def serialize_prediction(row):
+    """Convert a projected prediction row into an API response dict"""
+    return {
+        'id': row.id,
+        'stock_symbol': row.stock_symbol,
+        'predicted_price': row.predicted_price,
+        'actual_price': row.actual_price,
+        'prediction_date': row.prediction_date.isoformat(),
+        'model_used': row.model_used,
+        'confidence_score': row.confidence_score
+    }
 
 # Sample CSV data for demonstration
 def create_sample_data():
     """Create sample CSV data for TCS, WIPRO, and INFOSYS"""
+    import pandas as pd
+    import numpy as np
+    
     dates = pd.date_range(start='2020-01-01', end='2023-12-31', freq='D')
     
     # TCS data
@@ -150,34 +622,35 @@ def logout():
 @app.route('/api/predict', methods=['POST'])
 @login_required
 def predict():
+    from utils.forecasting import validate_horizon
+    
     data = request.get_json()
     stock_symbol = data['stock_symbol']
     model_type = data.get('model_type', 'lstm')
     
+    try:
+        horizon = validate_horizon(data.get('horizon', 1))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    
     try:
         # Load historical data
-        csv_file = f'data/{stock_symbol.lower()}_data.csv'
-        if not os.path.exists(csv_file):
+        series = price_store.get(stock_symbol)
+        if series is None:
             return jsonify({'error': 'Stock data not found'}), 404
         
-        df = pd.read_csv(csv_file)
-        
         # Make prediction
-        if model_type == 'lstm':
-            prediction = lstm_model.predict(df)
-        else:
-            prediction = linear_model.predict(df)
+        prediction, job = run_prediction(stock_symbol, model_type, series, horizon)
+        if job is not None:
+            return jsonify({
+                'message': 'Model is being trained, poll the job and retry',
+                'job': serialize_job(job),
+                'stock_symbol': stock_symbol,
+                'model_used': model_type
+            }), 202
         
-        # Save prediction to database
-        pred = Prediction(
-            user_id=current_user.id,
-            stock_symbol=stock_symbol,
-            predicted_price=prediction['predicted_price'],
-            model_used=model_type,
-            confidence_score=prediction.get('confidence', 0.8)
-        )
-        db.session.add(pred)
-        db.session.commit()
+        # Save prediction to database; the writer batches inserts across requests
+        prediction_writer.add([prediction_row(stock_symbol, model_type, prediction)])
         
         return jsonify({
             'prediction': prediction,
@@ -188,24 +661,197 @@ def predict():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/predict/batch', methods=['POST'])
+@login_required
+def predict_batch():
+    from utils.forecasting import validate_horizon
+    
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get('items'), list):
+        return jsonify({'error': 'Request body must be an object with an items list'}), 400
+    items = data['items']
+    if not items:
+        return jsonify({'error': 'No items to predict'}), 400
+    if len(items) > app.config['MAX_BATCH_ITEMS']:
+        return jsonify({'error': f"At most {app.config['MAX_BATCH_ITEMS']} items per batch"}), 400
+    
+    # Group items so each (symbol, model, horizon) is run once however often it is requested
+    groups = {}
+    results = [None] * len(items)
+    for index, item in enumerate(items):
+        # A malformed item fails on its own; the rest of the batch still runs
+        stock_symbol = model_type = None
+        try:
+            if not isinstance(item, dict):
+                raise ValueError("Each item must be an object")
+            stock_symbol = item.get('stock_symbol')
+            model_type = item.get('model_type', 'lstm')
+            if not isinstance(stock_symbol, str) or not stock_symbol:
+                raise ValueError("stock_symbol is required")
+            if not isinstance(model_type, str):
+                raise ValueError("model_type must be a string")
+            horizon = validate_horizon(item.get('horizon', 1))
+        except (TypeError, ValueError) as e:
+            results[index] = {'status': 'error', 'error': str(e), 'stock_symbol': stock_symbol,
+                              'model_used': model_type}
+            continue
+        key = (stock_symbol.upper(), ModelRegistry.normalize_model_type(model_type), horizon)
+        groups.setdefault(key, []).append((index, stock_symbol, model_type))
+    
+    rows = []
+    for (symbol, registry_type, horizon), members in groups.items():
+        try:
+            series = price_store.get(symbol)
+            if series is None:
+                outcome = {'status': 'error', 'error': 'Stock data not found'}
+            else:
+                prediction, job = run_prediction(symbol, registry_type, series, horizon)
+                if job is not None:
+                    outcome = {'status': 'training', 'job': serialize_job(job)}
+                else:
+                    outcome = {'status': 'ok', 'prediction': prediction}
+        except Exception as e:
+            outcome = {'status': 'error', 'error': str(e)}
+        
+        for index, stock_symbol, model_type in members:
+            results[index] = dict(outcome, stock_symbol=stock_symbol, model_used=model_type)
+            if outcome['status'] == 'ok':
+                rows.append(prediction_row(stock_symbol, model_type, outcome['prediction']))
+    
+    # Save all predictions in a single batch
+    prediction_writer.add(rows)
+    
+    return jsonify({'results': results})
+
+@app.route('/api/train', methods=['POST'])
+@login_required
+def train():
+    data = request.get_json()
+    stock_symbol = data['stock_symbol']
+    model_type = ModelRegistry.normalize_model_type(data.get('model_type', 'lstm'))
+    
+    series = price_store.get(stock_symbol)
+    if series is None:
+        return jsonify({'error': 'Stock data not found'}), 404
+    
+    data_version = series.version
+    if model_registry.is_available(stock_symbol, model_type, data_version) and not data.get('force'):
+        return jsonify({'message': 'Model is already trained', 'status': 'ready'})
+    
+    try:
+        train_kwargs = training_budget(data, model_type)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # force retrains from scratch; otherwise an earlier model is updated with the new bars
+    if data.get('force'):
+        train_kwargs['full'] = True
+    job = training_queue.submit(stock_symbol, model_type, data_version, user_id=current_user.id,
+                                train_kwargs=train_kwargs)
+    return jsonify({'job': serialize_job(job)}), 202
+
+@app.route('/api/train/bulk', methods=['POST'])
+@login_required
+def train_bulk():
+    """Retrain many symbols and model types in worker processes (admin only)"""
+    if not current_user.is_admin:
+        return jsonify({'error': 'Admin access required'}), 403
+    
+    from utils.bulk_training import plan
+    data = request.get_json() or {}
+    symbols = data.get('symbols') or price_store.load_all()
+    model_types = sorted({ModelRegistry.normalize_model_type(t) for t in data.get('model_types', ['lstm', 'linear'])})
+    
+    try:
+        train_kwargs = {model_type: training_budget(data, model_type) for model_type in model_types}
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    force = bool(data.get('force'))
+    jobs = plan(price_store, model_registry, symbols, model_types, force=force)
+    if not jobs:
+        return jsonify({'message': 'All models are already trained', 'jobs': []})
+    
+    rows = training_queue.submit_bulk(jobs, user_id=current_user.id, processes=app.config['TRAINING_PROCESSES'],
+                                      full=force, train_kwargs=train_kwargs)
+    return jsonify({'jobs': [serialize_job(job) for job in rows]}), 202
+
+@app.route('/api/jobs/<int:job_id>')
+@login_required
+def get_job(job_id):
+    job = db.session.get(TrainingJob, job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    return jsonify({'job': serialize_job(job)})
+
+@app.route('/api/backtest/<stock_symbol>', methods=['GET'])
+@login_required
+def get_backtests(stock_symbol):
+    """Stored backtests of a symbol, newest first, optionally for one model type"""
+    query = BacktestRun.query.filter(BacktestRun.stock_symbol == stock_symbol.upper())
+    if request.args.get('model_type'):
+        query = query.filter(BacktestRun.model_type == ModelRegistry.normalize_model_type(request.args['model_type']))
+    runs = query.order_by(BacktestRun.created_at.desc(), BacktestRun.id.desc()).limit(20).all()
+    return jsonify({'backtests': [serialize_backtest(run) for run in runs]})
+
+@app.route('/api/backtest/<stock_symbol>', methods=['POST'])
+@login_required
+def run_backtest(stock_symbol):
+    """Queue a walk-forward backtest on the current data, or return the matching stored one"""
+    data = request.get_json() or {}
+    model_type = ModelRegistry.normalize_model_type(data.get('model_type', 'linear'))
+    
+    series = price_store.get(stock_symbol)
+    if series is None:
+        return jsonify({'error': 'Stock data not found'}), 404
+    
+    try:
+        params = {
+            'mode': data.get('mode', 'expanding'),
+            'n_folds': int(data.get('folds', 5)),
+            'min_train': int(data['min_train']) if data.get('min_train') is not None else None,
+            'tolerance': float(data.get('tolerance', 0.02))
+        }
+        if params['mode'] not in BACKTEST_MODES:
+            raise ValueError(f"Mode must be one of {', '.join(BACKTEST_MODES)}")
+        if not 1 <= params['n_folds'] <= 50:
+            raise ValueError("folds must be between 1 and 50")
+        if params['min_train'] is not None and params['min_train'] < 1:
+            raise ValueError("min_train must be at least 1")
+        if params['tolerance'] <= 0:
+            raise ValueError("tolerance must be greater than 0")
+        if model_type == 'lstm':
+            # Backtests train on the shared workers too, so they get the training epoch cap
+            params['train_kwargs'] = {'epochs': int(data.get('epochs', 20)),
+                                      'warm_epochs': int(data.get('warm_epochs', 5))}
+            for name, epochs in params['train_kwargs'].items():
+                if not 1 <= epochs <= app.config['TRAINING_MAX_EPOCHS']:
+                    raise ValueError(f"{name} must be between 1 and {app.config['TRAINING_MAX_EPOCHS']}")
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    
+    run = backtest_queue.submit(stock_symbol, model_type, series.version, params, user_id=current_user.id)
+    return jsonify({'backtest': serialize_backtest(run)}), 200 if run.status == 'completed' else 202
+
 @app.route('/api/history')
 @login_required
 def get_history():
-    predictions = Prediction.query.filter_by(user_id=current_user.id).order_by(Prediction.prediction_date.desc()).all()
-    
-    history = []
-    for pred in predictions:
-        history.append({
-            'id': pred.id,
-            'stock_symbol': pred.stock_symbol,
-            'predicted_price': pred.predicted_price,
-            'actual_price': pred.actual_price,
-            'prediction_date': pred.prediction_date.isoformat(),
-            'model_used': pred.model_used,
-            'confidence_score': pred.confidence_score
-        })
+    query = db.session.query(*PREDICTION_COLUMNS).filter(Prediction.user_id == current_user.id)
+    try:
+        # Predictions the writer has not committed yet are newer than the user's committed
+        # ones, so they open the listing and count against the page size. The database
+        # rows skip them in case they get committed while the page is built.
+        pending = pending_predictions(current_user.id)
+        if pending:
+            query = query.filter(Prediction.prediction_date.notin_([row['prediction_date'] for row in pending]))
+        query, limit = page_predictions(query)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    return jsonify({'history': history})
+    # A page ending on a pending row continues with the rows older than it
+    leading = [(serialize_pending_prediction(row), encode_cursor(row['prediction_date'], 0)) for row in pending]
+    return stream_predictions('history', query, limit, serialize_prediction, leading=leading)
 
 @app.route('/api/stocks')
 def get_stocks():
@@ -219,33 +865,91 @@ def get_stocks():
 @app.route('/api/charts/<stock_symbol>')
 def get_charts(stock_symbol):
     try:
-        csv_file = f'data/{stock_symbol.lower()}_data.csv'
-        if not os.path.exists(csv_file):
+        try:
+            max_points, resolution = chart_options()
+            selected = selected_charts()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        series = price_store.get(stock_symbol)
+        if series is None:
             return jsonify({'error': 'Stock data not found'}), 404
         
-        df = pd.read_csv(csv_file)
+        from utils.chart_generator import combine_charts
         
-        # Generate different chart types
-        line_chart = chart_generator.create_line_chart(df, stock_symbol)
-        candlestick_chart = chart_generator.create_candlestick_chart(df, stock_symbol)
-        pie_chart = chart_generator.create_pie_chart(df, stock_symbol)
+        # Only the selected charts are rendered, each cached on its own
+        entries = {CHART_KEYS[chart_type]: chart_entry(chart_type, series, max_points, resolution)
+                   for chart_type in selected}
+        etags = ' '.join(entry[0] for entry in entries.values())
+        body = combine_charts({name: entry[1] for name, entry in entries.items()})
+        return chart_response(body, ChartCache.etag_for(etags.encode('utf-8')))
         
-        return jsonify({
-            'line_chart': line_chart,
-            'candlestick_chart': candlestick_chart,
-            'pie_chart': pie_chart
-        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/charts/<stock_symbol>/<chart_type>')
+def get_chart(stock_symbol, chart_type):
+    if chart_type != 'prediction' and chart_type not in CHART_KEYS:
+        return jsonify({'error': f"Unknown chart type: {chart_type}"}), 404
+    
+    try:
+        try:
+            max_points, resolution = chart_options()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        series = price_store.get(stock_symbol)
+        if series is None:
+            return jsonify({'error': 'Stock data not found'}), 404
+        
+        if chart_type == 'prediction':
+            return get_prediction_chart(stock_symbol, series, max_points)
+        
+        etag, body = chart_entry(chart_type, series, max_points, resolution)
+        return chart_response(body, etag)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def get_prediction_chart(stock_symbol, series, max_points):
+    """History with the model's forecast path; needs a login since it may queue training"""
+    from utils.forecasting import validate_horizon
+    
+    if not current_user.is_authenticated:
+        return login_manager.unauthorized()
+    
+    model_type = request.args.get('model_type', 'lstm')
+    try:
+        horizon = validate_horizon(request.args.get('horizon', 1))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    
+    prediction, job = run_prediction(stock_symbol, model_type, series, horizon)
+    if job is not None:
+        return jsonify({
+            'message': 'Model is being trained, poll the job and retry',
+            'job': serialize_job(job),
+            'stock_symbol': stock_symbol,
+            'model_used': model_type
+        }), 202
+    
+    # Predictions depend on the loaded model, so this chart is not cached
+    body = chart_generator.create_prediction_chart(series.frame, prediction, series.stock_symbol,
+                                                   max_points=max_points)
+    return chart_response(body)
+
 @app.route('/api/admin/users')
 @login_required
 def get_users():
     if not current_user.is_admin:
         return jsonify({'error': 'Admin access required'}), 403
     
-    users = User.query.all()
+    # Prediction counts come from the summary table rather than loading each user's predictions
+    users = db.session.query(
+        User.id, User.username, User.email, User.is_admin, User.created_at,
+        db.func.coalesce(PredictionSummary.prediction_count, 0).label('prediction_count')
+    ).outerjoin(PredictionSummary, PredictionSummary.user_id == User.id).order_by(User.id).all()
+    
     user_list = []
     for user in users:
         user_list.append({
@@ -254,7 +958,7 @@ def get_users():
             'email': user.email,
             'is_admin': user.is_admin,
             'created_at': user.created_at.isoformat(),
-            'prediction_count': len(user.predictions)
+            'prediction_count': user.prediction_count
         })
     
     return jsonify({'users': user_list})
@@ -265,45 +969,47 @@ def get_all_predictions():
     if not current_user.is_admin:
         return jsonify({'error': 'Admin access required'}), 403
     
-    predictions = Prediction.query.order_by(Prediction.prediction_date.desc()).all()
-    
-    pred_list = []
-    for pred in predictions:
-        pred_list.append({
-            'id': pred.id,
-            'user_id': pred.user_id,
-            'username': pred.user.username,
-            'stock_symbol': pred.stock_symbol,
-            'predicted_price': pred.predicted_price,
-            'actual_price': pred.actual_price,
-            'prediction_date': pred.prediction_date.isoformat(),
-            'model_used': pred.model_used,
-            'confidence_score': pred.confidence_score
-        })
+    # Usernames come from a join in the same query instead of one lazy load per row
+    query = db.session.query(*PREDICTION_COLUMNS, Prediction.user_id, User.username).join(
+        User, User.id == Prediction.user_id)
+    try:
+        query, limit = page_predictions(query)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    return jsonify({'predictions': pred_list})
+    def serialize(row):
+        return dict(serialize_prediction(row), user_id=row.user_id, username=row.username)
+    
+    return stream_predictions('predictions', query, limit, serialize)
 
 @app.route('/api/stats')
 def get_stats():
     total_users = User.query.count()
-    total_predictions = Prediction.query.count()
     
-    # Calculate average prediction accuracy
-    predictions_with_actual = Prediction.query.filter(Prediction.actual_price.isnot(None)).all()
-    if predictions_with_actual:
-        accuracy = np.mean([abs(p.predicted_price - p.actual_price) / p.actual_price for p in predictions_with_actual])
-    else:
-        accuracy = 0
+    # Totals and the average prediction error come from the per-user summary rows
+    total_predictions, accuracy = prediction_stats.totals()
     
-    return jsonify({
+    stats = {
         'total_users': total_users,
         'total_predictions': total_predictions,
-        'average_accuracy': accuracy
-    })
+        'average_accuracy': accuracy,
+        'accuracy_by_model': prediction_stats.accuracy_by_model()
+    }
+    if current_user.is_authenticated:
+        # The same totals for the signed-in user, so pages listing one page of rows need not count them
+        count, resolved, error = prediction_stats.user_totals(current_user.id)
+        stats['user'] = {'total_predictions': count, 'resolved_predictions': resolved, 'average_accuracy': error}
+    return jsonify(stats)
 
 if __name__ == '__main__':
     with app.app_context():
-        db.create_all()
+        created = migrate(db)
+        if created:
+            print(f"Created indexes: {', '.join(created)}")
+        prediction_stats.ensure_built()
+        prediction_writer.replay_journal()
+        training_queue.recover()
+        backtest_queue.recover()
         
         # Create admin user if not exists
         admin = User.query.filter_by(username='admin').first()
@@ -1,44 +1,72 @@
+import os
+import joblib
 import pandas as pd
 import numpy as np
 from sklearn.linear_model import LinearRegression
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import mean_squared_error, r2_score
+from numpy.lib.stride_tricks import sliding_window_view
+from utils.indicators import compute_indicators, latest_indicators, technical_summary
+from utils.forecasting import MAX_HORIZON, forecast_payload
+from utils.drift import DriftMonitor
 import warnings
 warnings.filterwarnings('ignore')
 
+# Rows of history needed for the longest rolling feature window
+FEATURE_LOOKBACK = 20
+
+# Raw rows kept after training so update() can build features and horizon targets for new bars
+TAIL_ROWS = FEATURE_LOOKBACK - 1 + MAX_HORIZON
+TAIL_COLUMNS = ['Date', 'Open', 'High', 'Low', 'Close', 'Volume']
+
+def _sums(X, Y):
+    """Sufficient statistics of a least squares fit: row count and sums of x, xx', y and xy'"""
+    X = np.asarray(X, dtype=np.float64)
+    Y = np.asarray(Y, dtype=np.float64).reshape(len(X), -1)
+    return {'n': len(X), 'x': X.sum(axis=0), 'xx': X.T @ X, 'y': Y.sum(axis=0), 'xy': X.T @ Y}
+
+def _add_sums(total, extra):
+    return {key: total[key] + extra[key] for key in total}
+
+def _moments(sums):
+    """Means of x and y, covariance of x and cross-covariance of x with y"""
+    n = sums['n']
+    mean_x = sums['x'] / n
+    mean_y = sums['y'] / n
+    cov = sums['xx'] / n - np.outer(mean_x, mean_x)
+    cross = sums['xy'] / n - np.outer(mean_x, mean_y)
+    return mean_x, mean_y, cov, cross
+
+def _solve(sums):
+    """Least squares (coef, intercept) in raw feature units, coef shaped (features, targets)
+
+    Solved on standardized features for conditioning (volume is ~1e6, ratios ~1).
+    """
+    mean_x, mean_y, cov, cross = _moments(sums)
+    scale = np.sqrt(np.clip(np.diag(cov), 0, None))
+    scale[scale == 0] = 1.0
+    beta = np.linalg.lstsq(cov / np.outer(scale, scale), cross / scale[:, None], rcond=None)[0] / scale[:, None]
+    return beta, mean_y - mean_x @ beta
+
 class LinearRegressionModel:
     def __init__(self):
         self.model = LinearRegression()
         self.scaler = StandardScaler()
         self.is_trained = False
+        self.holdout_r2 = None
+        self.horizon_model = None
+        self.sums = None
+        self.tail = None
+        self.monitor = None
         
     def prepare_features(self, df):
         """Prepare features for linear regression"""
         # Create technical indicators as features
         df_features = df.copy()
-        
-        # Moving averages
-        df_features['MA_5'] = df['Close'].rolling(window=5).mean()
-        df_features['MA_10'] = df['Close'].rolling(window=10).mean()
-        df_features['MA_20'] = df['Close'].rolling(window=20).mean()
-        
-        # Price changes
-        df_features['Price_Change'] = df['Close'].pct_change()
-        df_features['Price_Change_5'] = df['Close'].pct_change(periods=5)
-        
-        # Volatility
-        df_features['Volatility'] = df['Close'].rolling(window=20).std()
-        
-        # RSI
-        delta = df['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        df_features['RSI'] = 100 - (100 / (1 + rs))
-        
-        # Volume features
-        df_features['Volume_MA'] = df['Volume'].rolling(window=20).mean()
-        df_features['Volume_Ratio'] = df['Volume'] / df_features['Volume_MA']
+        indicators = compute_indicators(df['Close'].values, df['Volume'].values)
+        for column in ['MA_5', 'MA_10', 'MA_20', 'Price_Change', 'Price_Change_5',
+                       'Volatility', 'RSI', 'Volume_MA', 'Volume_Ratio']:
+            df_features[column] = indicators[column]
         
         # High-Low ratio
         df_features['HL_Ratio'] = df['High'] / df['Low']
@@ -78,40 +106,172 @@ class LinearRegressionModel:
         rmse = np.sqrt(mse)
         r2 = r2_score(y_test, y_pred)
         
+        # Kept with the model so predictions don't re-score the whole history
+        self.holdout_r2 = r2
+        
+        # Direct multi-output model for the closes 1..MAX_HORIZON days ahead
+        self.horizon_model = self._fit_horizon_model(X, y)
+        
+        # Sums over every row, so update() can extend the fit exactly as bars arrive
+        self.sums = {'fit': _sums(X.values, y.values), 'horizon': None}
+        if self.horizon_model is not None:
+            self.sums['horizon'] = _sums(*self._horizon_rows(X, y))
+        self.tail = df[TAIL_COLUMNS].tail(TAIL_ROWS).reset_index(drop=True)
+        self.monitor = DriftMonitor(np.mean(np.abs(y_pred - y_test.values) / y_test.values))
         self.is_trained = True
         return {'mse': mse, 'rmse': rmse, 'r2': r2}
     
-    def predict(self, df):
-        """Predict the next day's stock price"""
-        if not self.is_trained:
-            self.train(df)
+    def _horizon_rows(self, X, y):
+        """Raw feature rows whose next MAX_HORIZON closes are known, with those closes"""
+        # Row i targets the closes of rows i+1 .. i+MAX_HORIZON
+        targets = sliding_window_view(y.values[1:], MAX_HORIZON)
+        return X.values[:len(targets)], targets
+    
+    def _fit_horizon_model(self, X, y):
+        """Fit one regression per future day on the already fitted feature scale"""
+        if len(y) <= MAX_HORIZON:
+            return None
         
-        # Prepare features for prediction
-        X, y = self.prepare_features(df)
+        features, targets = self._horizon_rows(X, y)
+        return LinearRegression().fit(self.scaler.transform(features), targets)
+    
+    def update(self, df_new_rows):
+        """Extend the fit with bars that arrived after training, without a full retrain
+        
+        df_new_rows holds only the new bars; the rows they need for their rolling
+        features come from the tail kept at training time. The bars are added to
+        the least squares sums and the scaler and both regressions are re-solved,
+        which gives the same model as a refit on every row seen so far (the
+        validation split included). Returns update metrics; when 'drift' is True
+        the error on the new bars is well above the validation error, the model
+        is left as it was and should be retrained from scratch.
+        """
+        if self.sums is None:
+            raise ValueError("Model was saved without incremental state, retrain it")
         
-        # Get the latest features
-        latest_features = X.iloc[-1:].values
-        latest_features_scaled = self.scaler.transform(latest_features)
+        new_count = len(df_new_rows)
+        combined = pd.concat([self.tail, df_new_rows[TAIL_COLUMNS]], ignore_index=True)
+        X, y = self.prepare_features(combined)
+        X_new, y_new = X.values[-new_count:], y.values[-new_count:]
         
-        # Make prediction
-        prediction = self.model.predict(latest_features_scaled)[0]
+        # Score the new bars before learning from them
+        predicted = self.model.predict(self.scaler.transform(X_new))
+        self.monitor.observe(np.abs(predicted - y_new) / y_new)
+        metrics = {
+            'mode': 'update',
+            'new_rows': new_count,
+            'recent_error': self.monitor.recent_error,
+            'baseline_error': self.monitor.baseline,
+            'drift': self.monitor.drifted
+        }
+        if metrics['drift']:
+            return metrics
+        
+        self.sums['fit'] = _add_sums(self.sums['fit'], _sums(X_new, y_new))
+        if self.sums['horizon'] is not None:
+            # Every complete row in the combined frame is one whose last target just arrived
+            self.sums['horizon'] = _add_sums(self.sums['horizon'], _sums(*self._horizon_rows(X, y)))
+        self._solve_from_sums()
+        
+        self.tail = combined.tail(TAIL_ROWS).reset_index(drop=True)
+        return metrics
+    
+    def _solve_from_sums(self):
+        """Set the scaler and both regressions from the accumulated sums"""
+        mean_x, _, cov, _ = _moments(self.sums['fit'])
+        var = np.clip(np.diag(cov), 0, None)
+        scale = np.where(var > 0, np.sqrt(var), 1.0)
+        self.scaler.mean_, self.scaler.var_, self.scaler.scale_ = mean_x, var, scale
+        self.scaler.n_samples_seen_ = self.sums['fit']['n']
+        
+        # Coefficients on the standardized features: x = mean + scale * z
+        beta, intercept = _solve(self.sums['fit'])
+        self.model.coef_ = beta[:, 0] * scale
+        self.model.intercept_ = float(intercept[0] + mean_x @ beta[:, 0])
+        if self.horizon_model is not None:
+            beta, intercept = _solve(self.sums['horizon'])
+            self.horizon_model.coef_ = (beta * scale[:, None]).T
+            self.horizon_model.intercept_ = intercept + mean_x @ beta
+    
+    def forecast(self, df, horizon):
+        """Predict the closing price for each of the next horizon days"""
+        if self.horizon_model is None:
+            raise ValueError("Model was trained without multi-day forecasting, retrain it")
+        
+        X, y = self.prepare_features(df.tail(FEATURE_LOOKBACK))
+        latest_features_scaled = self.scaler.transform(X.iloc[-1:].values)
+        return self.horizon_model.predict(latest_features_scaled)[0][:horizon]
+    
+    def save(self, path):
+        """Save the fitted regression and feature scaler to a directory"""
+        os.makedirs(path, exist_ok=True)
+        state = {
+            'model': self.model,
+            'scaler': self.scaler,
+            'holdout_r2': self.holdout_r2,
+            'horizon_model': self.horizon_model,
+            'sums': self.sums,
+            'tail': self.tail,
+            'monitor': self.monitor
+        }
+        joblib.dump(state, os.path.join(path, 'model.joblib'))
+    
+    @classmethod
+    def load(cls, path):
+        """Load a model previously written by save()"""
+        state = joblib.load(os.path.join(path, 'model.joblib'))
+        instance = cls()
+        instance.model = state['model']
+        instance.scaler = state['scaler']
+        instance.holdout_r2 = state.get('holdout_r2')
+        instance.horizon_model = state.get('horizon_model')
+        instance.sums = state.get('sums')
+        instance.tail = state.get('tail')
+        instance.monitor = state.get('monitor')
+        instance.is_trained = True
+        return instance
+    
+    def predict(self, df, technical_indicators=None, horizon=1):
+        """Predict the next day's stock price, and the path over horizon days if horizon > 1"""
+        if not self.is_trained:
+            self.train(df)
+        
+        if self.horizon_model is not None or horizon > 1:
+            # The horizon regression targets the following closes, so its first day is
+            # the next-day price at every horizon and the charted path starts from it.
+            # forecast() asks for a retrain when the model has no horizon regression.
+            path = self.forecast(df, horizon)
+            prediction = path[0]
+        else:
+            # Models saved before multi-day forecasting
+            # Only the trailing rows are needed to build the latest feature row
+            X, y = self.prepare_features(df.tail(FEATURE_LOOKBACK))
+            
+            # Get the latest features
+            latest_features = X.iloc[-1:].values
+            latest_features_scaled = self.scaler.transform(latest_features)
+            
+            # Make prediction
+            prediction = self.model.predict(latest_features_scaled)[0]
         
         # Calculate confidence based on R² score and recent volatility
         recent_prices = df['Close'].tail(30).values
         volatility = np.std(recent_prices) / np.mean(recent_prices)
         
         # Get model performance metrics
-        X_full, y_full = self.prepare_features(df)
-        X_full_scaled = self.scaler.transform(X_full)
-        y_pred_full = self.model.predict(X_full_scaled)
-        r2 = r2_score(y_full, y_pred_full)
+        if self.holdout_r2 is None:
+            # Models saved before the holdout score was stored: score once and keep it
+            X_full, y_full = self.prepare_features(df)
+            self.holdout_r2 = r2_score(y_full, self.model.predict(self.scaler.transform(X_full)))
+        r2 = self.holdout_r2
         
         confidence = max(0.5, min(0.95, r2 * (1 - volatility)))
         
-        # Calculate technical indicators
-        technical_indicators = self.get_technical_indicators(df)
+        # Calculate technical indicators unless the caller has them already
+        if technical_indicators is None:
+            technical_indicators = self.get_technical_indicators(df)
         
-        return {
+        result = {
             'predicted_price': round(prediction, 2),
             'confidence': round(confidence, 3),
             'current_price': round(df['Close'].iloc[-1], 2),
@@ -120,39 +280,12 @@ class LinearRegressionModel:
             'model_type': 'Linear Regression',
             'r2_score': round(r2, 3)
         }
+        if horizon > 1:
+            result['forecast'] = forecast_payload(df, path)
+        
+        return result
     
     def get_technical_indicators(self, df):
         """Calculate technical indicators"""
-        # RSI
-        delta = df['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        
-        # Moving averages
-        ma_20 = df['Close'].rolling(window=20).mean()
-        ma_50 = df['Close'].rolling(window=50).mean()
-        
-        # Bollinger Bands
-        bb_20 = df['Close'].rolling(window=20).mean()
-        bb_std = df['Close'].rolling(window=20).std()
-        bb_upper = bb_20 + (bb_std * 2)
-        bb_lower = bb_20 - (bb_std * 2)
-        
-        # MACD
-        exp1 = df['Close'].ewm(span=12).mean()
-        exp2 = df['Close'].ewm(span=26).mean()
-        macd = exp1 - exp2
-        signal = macd.ewm(span=9).mean()
-        
-        return {
-            'rsi': round(rsi.iloc[-1], 2),
-            'ma_20': round(ma_20.iloc[-1], 2),
-            'ma_50': round(ma_50.iloc[-1], 2),
-            'bb_upper': round(bb_upper.iloc[-1], 2),
-            'bb_lower': round(bb_lower.iloc[-1], 2),
-            'macd': round(macd.iloc[-1], 2),
-            'signal': round(signal.iloc[-1], 2),
-            'current_price': round(df['Close'].iloc[-1], 2)
-        }
\ No newline at end of file
+        values = latest_indicators(df['Close'].values, df['Volume'].values)
+        return technical_summary(values, df['Close'].iloc[-1])
\ No newline at end of file
@@ -0,0 +1,111 @@
+import numpy as np
+
+class NumpyLSTM:
+    """Inference-only forward pass of a stacked Keras LSTM -> Dense network in NumPy
+    
+    Built from the weights of a trained Keras model (dropout is a no-op at
+    inference) and saved as a plain .npz file, so serving predictions needs
+    neither TensorFlow nor Keras' per-call predict machinery.
+    """
+    def __init__(self, lstm_layers, dense_layers):
+        # lstm_layers: [(kernel, recurrent_kernel, bias, return_sequences)]
+        # dense_layers: [(kernel, bias)]
+        self.lstm_layers = lstm_layers
+        self.dense_layers = dense_layers
+    
+    @classmethod
+    def from_keras(cls, model):
+        """Copy the weights out of a trained Keras Sequential model"""
+        lstm_layers, dense_layers = [], []
+        for layer in model.layers:
+            kind = layer.__class__.__name__
+            if kind == 'LSTM':
+                config = layer.get_config()
+                if config.get('activation', 'tanh') != 'tanh' or \
+                        config.get('recurrent_activation', 'sigmoid') != 'sigmoid':
+                    raise ValueError("Only tanh/sigmoid LSTM layers are supported")
+                kernel, recurrent_kernel, bias = layer.get_weights()
+                lstm_layers.append((kernel.astype(np.float32), recurrent_kernel.astype(np.float32),
+                                    bias.astype(np.float32), bool(config['return_sequences'])))
+            elif kind == 'Dense':
+                if layer.get_config().get('activation', 'linear') != 'linear':
+                    raise ValueError("Only linear Dense layers are supported")
+                kernel, bias = layer.get_weights()
+                dense_layers.append((kernel.astype(np.float32), bias.astype(np.float32)))
+            elif kind not in ('Dropout', 'InputLayer'):
+                raise ValueError(f"Unsupported layer for NumPy inference: {kind}")
+        return cls(lstm_layers, dense_layers)
+    
+    def save(self, path):
+        """Write the weights to an .npz file"""
+        arrays = {}
+        for i, (kernel, recurrent_kernel, bias, return_sequences) in enumerate(self.lstm_layers):
+            arrays[f'lstm_{i}_kernel'] = kernel
+            arrays[f'lstm_{i}_recurrent_kernel'] = recurrent_kernel
+            arrays[f'lstm_{i}_bias'] = bias
+            arrays[f'lstm_{i}_return_sequences'] = np.array(return_sequences)
+        for i, (kernel, bias) in enumerate(self.dense_layers):
+            arrays[f'dense_{i}_kernel'] = kernel
+            arrays[f'dense_{i}_bias'] = bias
+        np.savez(path, **arrays)
+    
+    @classmethod
+    def load(cls, path):
+        """Read weights written by save()"""
+        with np.load(path) as arrays:
+            lstm_layers, dense_layers = [], []
+            i = 0
+            while f'lstm_{i}_kernel' in arrays:
+                lstm_layers.append((arrays[f'lstm_{i}_kernel'], arrays[f'lstm_{i}_recurrent_kernel'],
+                                    arrays[f'lstm_{i}_bias'], bool(arrays[f'lstm_{i}_return_sequences'])))
+                i += 1
+            i = 0
+            while f'dense_{i}_kernel' in arrays:
+                dense_layers.append((arrays[f'dense_{i}_kernel'], arrays[f'dense_{i}_bias']))
+                i += 1
+        return cls(lstm_layers, dense_layers)
+    
+    @staticmethod
+    def _sigmoid(x):
+        return 0.5 * (np.tanh(0.5 * x) + 1)
+    
+    def predict(self, X):
+        """Forward pass for windows shaped (batch, timesteps, features), returns (batch, outputs)"""
+        sequence = np.asarray(X, dtype=np.float32)
+        for kernel, recurrent_kernel, bias, return_sequences in self.lstm_layers:
+            batch, timesteps, _ = sequence.shape
+            units = recurrent_kernel.shape[0]
+            # Input projections for every timestep in one matmul; only h @ U stays in the loop
+            projected = sequence @ kernel + bias
+            h = np.zeros((batch, units), dtype=np.float32)
+            c = np.zeros((batch, units), dtype=np.float32)
+            outputs = np.empty((batch, timesteps, units), dtype=np.float32) if return_sequences else None
+            for t in range(timesteps):
+                z = projected[:, t] + h @ recurrent_kernel
+                i = self._sigmoid(z[:, :units])
+                f = self._sigmoid(z[:, units:2 * units])
+                g = np.tanh(z[:, 2 * units:3 * units])
+                o = self._sigmoid(z[:, 3 * units:])
+                c = f * c + i * g
+                h = o * np.tanh(c)
+                if return_sequences:
+                    outputs[:, t] = h
+            sequence = outputs if return_sequences else h
+        
+        for kernel, bias in self.dense_layers:
+            sequence = sequence @ kernel + bias
+        return sequence
+    
+    def rollout(self, window, horizon):
+        """Recursive multi-step forecast: each prediction becomes the newest input
+        
+        window is shaped (batch, timesteps, 1); returns (batch, horizon).
+        """
+        window = np.array(window, dtype=np.float32)
+        path = np.empty((window.shape[0], horizon), dtype=np.float32)
+        for step in range(horizon):
+            next_value = self.predict(window)[:, 0]
+            path[:, step] = next_value
+            window[:, :-1] = window[:, 1:]
+            window[:, -1, 0] = next_value
+        return path
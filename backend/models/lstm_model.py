@@ -1,41 +1,41 @@
+import os
+import time
+import joblib
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import MinMaxScaler
 from sklearn.metrics import mean_squared_error
-import tensorflow as tf
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dense, Dropout
+from models.lstm_inference import NumpyLSTM
+from utils.windows import make_windows
+from utils.preprocessing import PriceScaler
+from utils.indicators import latest_indicators, technical_summary
+from utils.forecasting import forecast_payload
+from utils.drift import DriftMonitor
 import warnings
 warnings.filterwarnings('ignore')
 
+# Most recent windows update() fine-tunes on, and for how many epochs
+FINETUNE_WINDOW = 250
+FINETUNE_EPOCHS = 3
+# New closes further outside the scaler's range than this share of it need a full retrain
+RANGE_TOLERANCE = 0.1
+
 class LSTMModel:
     def __init__(self):
-        self.scaler = MinMaxScaler()
+        self.scaler = PriceScaler()
         self.model = None
+        self.inference = None
         self.is_trained = False
         self.lookback = 60
+        self.tail = None
+        self.monitor = None
+        self._model_path = None
         
-    def prepare_data(self, df):
-        """Prepare data for LSTM model"""
-        # Use only closing prices for prediction
-        data = df['Close'].values.reshape(-1, 1)
-        
-        # Scale the data
-        scaled_data = self.scaler.fit_transform(data)
-        
-        # Create sequences for LSTM
-        X, y = [], []
-        for i in range(self.lookback, len(scaled_data)):
-            X.append(scaled_data[i-self.lookback:i, 0])
-            y.append(scaled_data[i, 0])
-        
-        X, y = np.array(X), np.array(y)
-        X = np.reshape(X, (X.shape[0], X.shape[1], 1))
-        
-        return X, y
-    
     def build_model(self):
         """Build LSTM model architecture"""
+        # TensorFlow is only imported when a network is built or trained
+        from tensorflow.keras.models import Sequential
+        from tensorflow.keras.layers import LSTM, Dense, Dropout
+        
         model = Sequential([
             LSTM(units=100, return_sequences=True, input_shape=(self.lookback, 1)),
             Dropout(0.2),
@@ -49,53 +49,231 @@ class LSTMModel:
         model.compile(optimizer='adam', loss='mean_squared_error')
         return model
     
-    def train(self, df, epochs=50, batch_size=32):
-        """Train the LSTM model"""
-        X, y = self.prepare_data(df)
+    def train(self, df, epochs=50, batch_size=32, patience=5, max_seconds=None, checkpoint_dir=None):
+        """Train the LSTM model
+        
+        Windows are fed through a tf.data pipeline (see window_dataset) instead of
+        an in-memory array. Training stops when val_loss has not improved for
+        patience epochs, after epochs epochs, or at the end of the epoch in which
+        max_seconds of wall-clock time ran out, and keeps the weights of the best
+        epoch. The learning rate is halved whenever val_loss plateaus. With
+        checkpoint_dir set, progress is saved there after every epoch and a run
+        interrupted with the same directory resumes from its last epoch.
+        
+        The scaler is fitted on the closes the training windows cover, so the
+        validation metrics (mse/rmse on the scaled closes, mae/mape in prices)
+        are measured on data the model and its preprocessing never saw.
+        """
+        from utils.windows import window_dataset
+        
+        close = df['Close'].values
+        n_windows = len(close) - self.lookback
+        if n_windows < 2:
+            raise ValueError(f"Insufficient data. Need more than {self.lookback + 1} values, got {len(close)}")
         
-        # Split data
-        train_size = int(len(X) * 0.8)
-        X_train, X_test = X[:train_size], X[train_size:]
-        y_train, y_test = y[:train_size], y[train_size:]
+        # Split windows; training window i reads closes i .. i + lookback
+        train_size = int(n_windows * 0.8)
+        self.scaler.fit(close[:train_size + self.lookback])
+        scaled = self.scaler.transform(close)
+        train_data = window_dataset(scaled, self.lookback, 0, train_size, batch_size, shuffle=True)
+        test_data = window_dataset(scaled, self.lookback, train_size, n_windows, batch_size, cache=True)
+        y_test = scaled[train_size + self.lookback:]
         
         # Build and train model
         self.model = self.build_model()
-        history = self.model.fit(X_train, y_train, epochs=epochs, batch_size=batch_size, 
-                               validation_data=(X_test, y_test), verbose=0)
+        callbacks, stops = self._training_callbacks(patience, max_seconds, checkpoint_dir)
+        history = self.model.fit(train_data, epochs=epochs, validation_data=test_data, callbacks=callbacks,
+                                 verbose=0).history
         
         # Evaluate model
-        y_pred = self.model.predict(X_test)
+        y_pred = self.model.predict(test_data, verbose=0)
         mse = mean_squared_error(y_test, y_pred)
         rmse = np.sqrt(mse)
         
+        # Validation error in price terms is the baseline update() watches for drift
+        predicted = self.scaler.inverse_transform(y_pred[:, 0])
+        actual = close[train_size + self.lookback:].astype(np.float64)
+        relative_error = np.abs(predicted - actual) / actual
+        self.monitor = DriftMonitor(np.mean(relative_error))
+        self.tail = df[['Date', 'Close']].tail(FINETUNE_WINDOW + self.lookback).reset_index(drop=True)
+        
+        self.inference = NumpyLSTM.from_keras(self.model)
         self.is_trained = True
-        return {'mse': mse, 'rmse': rmse, 'history': history.history}
+        return {
+            'mse': mse,
+            'rmse': rmse,
+            'mae': float(np.mean(np.abs(predicted - actual))),
+            'mape': float(np.mean(relative_error) * 100),
+            'train_samples': train_size,
+            'validation_samples': n_windows - train_size,
+            'history': history,
+            'epochs_run': len(history.get('loss', [])),
+            'best_val_loss': min(history['val_loss']) if history.get('val_loss') else None,
+            'stopped_by': stops()
+        }
     
-    def predict(self, df):
-        """Predict the next day's stock price"""
-        if not self.is_trained:
-            self.train(df)
+    def _training_callbacks(self, patience, max_seconds, checkpoint_dir):
+        """Keras callbacks for train() and a function naming what ended the run"""
+        from tensorflow.keras.callbacks import Callback, EarlyStopping, ReduceLROnPlateau, BackupAndRestore
+        
+        class TimeBudget(Callback):
+            """Stop at the end of the epoch in which the wall-clock budget ran out"""
+            def __init__(self, seconds):
+                super().__init__()
+                self.seconds = seconds
+                self.expired = False
+            
+            def on_train_begin(self, logs=None):
+                self.deadline = time.monotonic() + self.seconds
+            
+            def on_epoch_end(self, epoch, logs=None):
+                if time.monotonic() >= self.deadline:
+                    self.expired = True
+                    self.model.stop_training = True
+        
+        early_stopping = EarlyStopping(monitor='val_loss', patience=patience, restore_best_weights=True)
+        callbacks = [early_stopping,
+                     ReduceLROnPlateau(monitor='val_loss', factor=0.5, patience=max(1, patience // 2), min_lr=1e-5)]
+        budget = None
+        if max_seconds:
+            budget = TimeBudget(max_seconds)
+            callbacks.append(budget)
+        if checkpoint_dir:
+            # Restores the last finished epoch on start and is deleted once training completes
+            callbacks.insert(0, BackupAndRestore(checkpoint_dir))
+        
+        def stops():
+            if budget is not None and budget.expired:
+                return 'time_budget'
+            return 'early_stopping' if early_stopping.stopped_epoch > 0 else 'max_epochs'
+        return callbacks, stops
+    
+    def update(self, df_new_rows, epochs=FINETUNE_EPOCHS, batch_size=32):
+        """Fine-tune on bars that arrived after training instead of retraining from scratch
         
-        # Prepare recent data
-        data = df['Close'].values.reshape(-1, 1)
-        scaled_data = self.scaler.transform(data)
+        df_new_rows holds only the new bars; the closes before them come from the
+        tail kept at training time. The scaler range is widened to cover the new
+        closes and the current weights are trained for a few epochs on the most
+        recent FINETUNE_WINDOW windows. Returns update metrics; when 'drift' is
+        True (error on the new bars well above the validation error, or closes
+        far outside the scaler range) the model is left as it was and should be
+        retrained from scratch.
+        """
+        if self.tail is None:
+            raise ValueError("Model was saved without incremental state, retrain it")
         
-        # Get the last lookback days for prediction
-        X = scaled_data[-self.lookback:].reshape(1, self.lookback, 1)
+        new_count = len(df_new_rows)
+        combined = pd.concat([self.tail, df_new_rows[['Date', 'Close']]], ignore_index=True)
+        close = combined['Close'].values.astype(np.float64)
+        new_close = close[-new_count:]
         
-        # Make prediction
-        pred_scaled = self.model.predict(X)
-        prediction = self.scaler.inverse_transform(pred_scaled)[0][0]
+        # Score each new close from the lookback closes before it, before learning from it
+        X_new, _ = make_windows(self.scaler.transform(close[-(new_count + self.lookback):]), self.lookback)
+        predicted = self.scaler.inverse_transform(self.inference.predict(X_new)[:, 0])
+        self.monitor.observe(np.abs(predicted - new_close) / new_close)
+        
+        low, high = self.scaler.low, self.scaler.high
+        margin = RANGE_TOLERANCE * (high - low)
+        out_of_range = bool(new_close.min() < low - margin or new_close.max() > high + margin)
+        metrics = {
+            'mode': 'update',
+            'new_rows': new_count,
+            'recent_error': self.monitor.recent_error,
+            'baseline_error': self.monitor.baseline,
+            'out_of_range': out_of_range,
+            'drift': out_of_range or self.monitor.drifted
+        }
+        if metrics['drift']:
+            return metrics
+        
+        self.scaler.partial_fit(new_close)
+        recent = self.scaler.transform(close[-(FINETUNE_WINDOW + self.lookback):])
+        X, y = make_windows(recent, self.lookback)
+        history = self.keras_model().fit(X, y, epochs=epochs, batch_size=batch_size, verbose=0).history
+        
+        self.inference = NumpyLSTM.from_keras(self.model)
+        self.tail = combined.tail(FINETUNE_WINDOW + self.lookback).reset_index(drop=True)
+        metrics['loss'] = history['loss'][-1]
+        return metrics
+    
+    def keras_model(self):
+        """Return the Keras network, loading it from disk if only inference weights are in memory"""
+        if self.model is None and self._model_path is not None:
+            from tensorflow.keras.models import load_model
+            self.model = load_model(os.path.join(self._model_path, 'model.keras'))
+        return self.model
+    
+    def save(self, path):
+        """Save the trained network, its NumPy inference weights and preprocessing state to a directory"""
+        os.makedirs(path, exist_ok=True)
+        self.keras_model().save(os.path.join(path, 'model.keras'))
+        self.inference.save(os.path.join(path, 'weights.npz'))
+        joblib.dump(self.scaler, os.path.join(path, 'preprocessing.joblib'))
+        joblib.dump({'tail': self.tail, 'monitor': self.monitor}, os.path.join(path, 'update_state.joblib'))
+    
+    @classmethod
+    def load(cls, path):
+        """Load a model previously written by save()
+
+        Only the NumPy inference weights are loaded; the Keras network is loaded
+        on demand by keras_model(), so serving predictions does not import TensorFlow.
+        """
+        instance = cls()
+        instance._model_path = path
+        weights_path = os.path.join(path, 'weights.npz')
+        if os.path.exists(weights_path):
+            instance.inference = NumpyLSTM.load(weights_path)
+        else:
+            # Saved before inference weights were exported
+            instance.inference = NumpyLSTM.from_keras(instance.keras_model())
+        preprocessing_path = os.path.join(path, 'preprocessing.joblib')
+        if os.path.exists(preprocessing_path):
+            instance.scaler = joblib.load(preprocessing_path)
+        else:
+            # Saved with a MinMaxScaler before the preprocessing state existed
+            instance.scaler = PriceScaler.from_minmax(joblib.load(os.path.join(path, 'scaler.joblib')))
+        state_path = os.path.join(path, 'update_state.joblib')
+        if os.path.exists(state_path):
+            state = joblib.load(state_path)
+            instance.tail = state['tail']
+            instance.monitor = state['monitor']
+        instance.is_trained = True
+        return instance
+    
+    def forecast(self, df, horizon):
+        """Predict the closing price for each of the next horizon days in one rollout call"""
+        window = self.scaler.window(df['Close'].values, self.lookback)
+        
+        path_scaled = self.inference.rollout(window, horizon)
+        return self.scaler.inverse_transform(path_scaled.reshape(-1))
+    
+    def predict(self, df, technical_indicators=None, horizon=1):
+        """Predict the next day's stock price, and the path over horizon days if horizon > 1"""
+        if not self.is_trained:
+            self.train(df)
+        
+        if horizon > 1:
+            # The first step of the rollout is the next-day prediction
+            path = self.forecast(df, horizon)
+            prediction = path[0]
+        else:
+            # Scale only the last lookback days, the network's whole input
+            X = self.scaler.window(df['Close'].values, self.lookback)
+            
+            # Make prediction
+            pred_scaled = self.inference.predict(X)
+            prediction = self.scaler.inverse_transform(pred_scaled)[0][0]
         
         # Calculate confidence based on recent volatility
         recent_prices = df['Close'].tail(30).values
         volatility = np.std(recent_prices) / np.mean(recent_prices)
         confidence = max(0.5, 1 - volatility)
         
-        # Calculate technical indicators
-        technical_indicators = self.get_technical_indicators(df)
+        # Calculate technical indicators unless the caller has them already
+        if technical_indicators is None:
+            technical_indicators = self.get_technical_indicators(df)
         
-        return {
+        result = {
             'predicted_price': round(prediction, 2),
             'confidence': round(confidence, 3),
             'current_price': round(df['Close'].iloc[-1], 2),
@@ -103,39 +281,12 @@ class LSTMModel:
             'technical_indicators': technical_indicators,
             'model_type': 'LSTM'
         }
+        if horizon > 1:
+            result['forecast'] = forecast_payload(df, path)
+        
+        return result
     
     def get_technical_indicators(self, df):
         """Calculate technical indicators"""
-        # RSI
-        delta = df['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        
-        # Moving averages
-        ma_20 = df['Close'].rolling(window=20).mean()
-        ma_50 = df['Close'].rolling(window=50).mean()
-        
-        # Bollinger Bands
-        bb_20 = df['Close'].rolling(window=20).mean()
-        bb_std = df['Close'].rolling(window=20).std()
-        bb_upper = bb_20 + (bb_std * 2)
-        bb_lower = bb_20 - (bb_std * 2)
-        
-        # MACD
-        exp1 = df['Close'].ewm(span=12).mean()
-        exp2 = df['Close'].ewm(span=26).mean()
-        macd = exp1 - exp2
-        signal = macd.ewm(span=9).mean()
-        
-        return {
-            'rsi': round(rsi.iloc[-1], 2),
-            'ma_20': round(ma_20.iloc[-1], 2),
-            'ma_50': round(ma_50.iloc[-1], 2),
-            'bb_upper': round(bb_upper.iloc[-1], 2),
-            'bb_lower': round(bb_lower.iloc[-1], 2),
-            'macd': round(macd.iloc[-1], 2),
-            'signal': round(signal.iloc[-1], 2),
-            'current_price': round(df['Close'].iloc[-1], 2)
-        }
\ No newline at end of file
+        values = latest_indicators(df['Close'].values, df['Volume'].values)
+        return technical_summary(values, df['Close'].iloc[-1])
\ No newline at end of file
@@ -0,0 +1,245 @@
+import os
+import json
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import datetime
+import numpy as np
+
+def model_class(model_type):
+    """Model class for a registry model type, imported on first use
+    
+    The model modules pull in scikit-learn (and TensorFlow when training an
+    LSTM), so they are not imported until a model is actually loaded or trained.
+    """
+    if model_type == 'lstm':
+        from models.lstm_model import LSTMModel
+        return LSTMModel
+    from models.linear_regression_model import LinearRegressionModel
+    return LinearRegressionModel
+
+class ModelRegistry:
+    """Trained models keyed by (symbol, model type, data version)
+    
+    Models are persisted under store_path/<symbol>/<model_type>/<data_version>/
+    and loaded on first use. At most max_loaded models are kept in memory; the
+    least recently used one is evicted when the limit is reached.
+    """
+    def __init__(self, store_path='model_store/', max_loaded=6):
+        self.store_path = store_path
+        self.max_loaded = max_loaded
+        self._loaded = OrderedDict()
+        self._lock = threading.RLock()
+    
+    @staticmethod
+    def normalize_model_type(model_type):
+        """Map a requested model type onto a registry model type"""
+        return 'lstm' if model_type == 'lstm' else 'linear'
+    
+    def model_dir(self, stock_symbol, model_type, data_version):
+        """Directory holding one persisted model"""
+        return os.path.join(self.store_path, stock_symbol.lower(), model_type, data_version)
+    
+    def get(self, stock_symbol, model_type, data_version):
+        """Return a ready model, loading it from disk if needed, or None if it was never trained"""
+        key = (stock_symbol.upper(), model_type, data_version)
+        with self._lock:
+            if key in self._loaded:
+                self._loaded.move_to_end(key)
+                return self._loaded[key]
+            
+            path = self.model_dir(stock_symbol, model_type, data_version)
+            if not os.path.exists(os.path.join(path, 'meta.json')):
+                return None
+            
+            model = model_class(model_type).load(path)
+            self._remember(key, model)
+            return model
+    
+    def is_available(self, stock_symbol, model_type, data_version):
+        """Check whether a model exists in memory or on disk without loading it"""
+        key = (stock_symbol.upper(), model_type, data_version)
+        if key in self._loaded:
+            return True
+        path = self.model_dir(stock_symbol, model_type, data_version)
+        return os.path.exists(os.path.join(path, 'meta.json'))
+    
+    def checkpoint_dir(self, stock_symbol, model_type, data_version):
+        """Directory for the resumable training state of one model"""
+        return os.path.join(self.store_path, '.checkpoints', stock_symbol.lower(), model_type, data_version)
+    
+    def train(self, stock_symbol, model_type, data_version, df, **train_kwargs):
+        """Train a fresh model on df, persist it and make it the cached entry
+        
+        LSTM training checkpoints every epoch, so a run for the same data version
+        that was interrupted (for example by a restart) resumes where it stopped.
+        """
+        model = model_class(model_type)()
+        checkpoint_dir = self.checkpoint_dir(stock_symbol, model_type, data_version)
+        if model_type == 'lstm':
+            train_kwargs.setdefault('checkpoint_dir', checkpoint_dir)
+        metrics = model.train(df, **train_kwargs)
+        self.save(stock_symbol, model_type, data_version, model, metrics)
+        shutil.rmtree(checkpoint_dir, ignore_errors=True)
+        return model, metrics
+    
+    def refresh(self, stock_symbol, model_type, data_version, df, full=False, **train_kwargs):
+        """Bring a symbol's model up to data_version, incrementally when possible
+        
+        The model persisted for an earlier data version is updated with the bars
+        appended since (see the models' update()). A full retrain runs instead
+        when full is set, there is no earlier model or it has no incremental
+        state, earlier rows were changed rather than appended, or the update
+        reports drift.
+        """
+        reason = 'requested'
+        if not full:
+            model, metrics = self._update(stock_symbol, model_type, df)
+            if model is not None:
+                self.save(stock_symbol, model_type, data_version, model, metrics)
+                return model, metrics
+            reason = metrics
+        
+        model, metrics = self.train(stock_symbol, model_type, data_version, df, **train_kwargs)
+        return model, dict(metrics, mode='full', retrain_reason=reason)
+    
+    def _update(self, stock_symbol, model_type, df):
+        """Update the latest persisted model with df's new rows: (model, metrics) or (None, reason)"""
+        version = self.latest_version(stock_symbol, model_type)
+        if version is None:
+            return None, 'no earlier model'
+        
+        # A private copy, so requests served from the cached model never see it half updated
+        model = model_class(model_type).load(self.model_dir(stock_symbol, model_type, version))
+        if model.tail is None:
+            return None, 'no incremental state'
+        
+        last_date = np.datetime64(model.tail['Date'].iloc[-1])
+        dates = df['Date'].values
+        known = df['Close'].values[dates == last_date]
+        if len(known) != 1 or known[0] != model.tail['Close'].iloc[-1]:
+            return None, 'history changed'
+        new_rows = df[dates > last_date]
+        if len(new_rows) == 0:
+            return None, 'history changed'
+        
+        metrics = model.update(new_rows)
+        if metrics['drift']:
+            return None, 'drift'
+        return model, metrics
+    
+    def latest_version(self, stock_symbol, model_type):
+        """Data version of the most recently trained persisted model, or None"""
+        parent = os.path.join(self.store_path, stock_symbol.lower(), model_type)
+        if not os.path.isdir(parent):
+            return None
+        trained = []
+        for version in os.listdir(parent):
+            meta = self.metadata(stock_symbol, model_type, version) if not version.startswith('.') else None
+            if meta:
+                trained.append((meta.get('trained_at', ''), version))
+        return max(trained)[1] if trained else None
+    
+    def save(self, stock_symbol, model_type, data_version, model, metrics=None):
+        """Persist a trained model and drop older data versions of it
+        
+        The model is written to a staging directory next to its final place and
+        renamed into place, so readers (in this or another process) only ever
+        see a complete model.
+        """
+        path = self.model_dir(stock_symbol, model_type, data_version)
+        parent = os.path.dirname(path)
+        os.makedirs(parent, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=f'.{data_version}-', dir=parent)
+        try:
+            os.chmod(staging, 0o755)
+            model.save(staging)
+            
+            meta = {
+                'stock_symbol': stock_symbol.upper(),
+                'model_type': model_type,
+                'data_version': data_version,
+                'trained_at': datetime.utcnow().isoformat(),
+                'metrics': _json_safe(metrics or {})
+            }
+            with open(os.path.join(staging, 'meta.json'), 'w') as f:
+                json.dump(meta, f)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        
+        # A retrained version replaces the previous copy of the same version
+        retired = None
+        if os.path.exists(path):
+            retired = staging + '.old'
+            os.rename(path, retired)
+        try:
+            os.rename(staging, path)
+        except OSError:
+            # Another process moved the same version into place meanwhile; keep theirs
+            shutil.rmtree(staging, ignore_errors=True)
+        if retired:
+            shutil.rmtree(retired, ignore_errors=True)
+        
+        with self._lock:
+            self._remember((stock_symbol.upper(), model_type, data_version), model)
+        self._prune(stock_symbol, model_type, keep=data_version)
+    
+    def metadata(self, stock_symbol, model_type, data_version):
+        """Read the stored metadata for a model, or None"""
+        path = os.path.join(self.model_dir(stock_symbol, model_type, data_version), 'meta.json')
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+    
+    def forget(self, stock_symbol, model_type):
+        """Drop a symbol's in-memory models so the next get() reloads from disk
+        
+        Needed after another process (e.g. a bulk training worker) wrote the model.
+        """
+        with self._lock:
+            stale = [key for key in self._loaded if key[0] == stock_symbol.upper() and key[1] == model_type]
+            for key in stale:
+                del self._loaded[key]
+    
+    def _remember(self, key, model):
+        """Insert into the in-memory cache, evicting the least recently used model"""
+        self._loaded[key] = model
+        self._loaded.move_to_end(key)
+        while len(self._loaded) > self.max_loaded:
+            self._loaded.popitem(last=False)
+    
+    def _prune(self, stock_symbol, model_type, keep):
+        """Remove persisted models trained on outdated data"""
+        parent = os.path.join(self.store_path, stock_symbol.lower(), model_type)
+        for version in os.listdir(parent):
+            # Dot entries are other writers' staging directories
+            if version != keep and not version.startswith('.'):
+                shutil.rmtree(os.path.join(parent, version), ignore_errors=True)
+        
+        # Checkpoints of runs for outdated data will never be resumed
+        checkpoints = os.path.join(self.store_path, '.checkpoints', stock_symbol.lower(), model_type)
+        if os.path.isdir(checkpoints):
+            for version in os.listdir(checkpoints):
+                if version != keep:
+                    shutil.rmtree(os.path.join(checkpoints, version), ignore_errors=True)
+        
+        with self._lock:
+            stale = [key for key in self._loaded
+                     if key[0] == stock_symbol.upper() and key[1] == model_type and key[2] != keep]
+            for key in stale:
+                del self._loaded[key]
+
+def _json_safe(value):
+    """Convert NumPy scalars and arrays in training metrics to plain Python"""
+    if isinstance(value, dict):
+        return {k: _json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
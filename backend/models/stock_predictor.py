@@ -5,6 +5,8 @@ from sklearn.metrics import mean_squared_error
 import tensorflow as tf
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import LSTM, Dense, Dropout
+from utils.windows import make_windows
+from utils.indicators import latest_indicators
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -22,14 +24,8 @@ class StockPredictor:
         # Scale the data
         scaled_data = self.scaler.fit_transform(data)
         
-        # Create sequences for LSTM
-        X, y = [], []
-        for i in range(lookback, len(scaled_data)):
-            X.append(scaled_data[i-lookback:i, 0])
-            y.append(scaled_data[i, 0])
-        
-        X, y = np.array(X), np.array(y)
-        X = np.reshape(X, (X.shape[0], X.shape[1], 1))
+        # Create sequences for LSTM as a view over the scaled series
+        X, y = make_windows(scaled_data[:, 0], lookback)
         
         return X, y
     
@@ -99,28 +95,13 @@ class StockPredictor:
     
     def get_technical_indicators(self, df):
         """Calculate technical indicators"""
-        # RSI
-        delta = df['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        
-        # Moving averages
-        ma_20 = df['Close'].rolling(window=20).mean()
-        ma_50 = df['Close'].rolling(window=50).mean()
-        
-        # Bollinger Bands
-        bb_20 = df['Close'].rolling(window=20).mean()
-        bb_std = df['Close'].rolling(window=20).std()
-        bb_upper = bb_20 + (bb_std * 2)
-        bb_lower = bb_20 - (bb_std * 2)
+        values = latest_indicators(df['Close'].values)
         
         return {
-            'rsi': rsi.iloc[-1],
-            'ma_20': ma_20.iloc[-1],
-            'ma_50': ma_50.iloc[-1],
-            'bb_upper': bb_upper.iloc[-1],
-            'bb_lower': bb_lower.iloc[-1],
+            'rsi': values['RSI'],
+            'ma_20': values['MA_20'],
+            'ma_50': values['MA_50'],
+            'bb_upper': values['BB_Upper'],
+            'bb_lower': values['BB_Lower'],
             'current_price': df['Close'].iloc[-1]
         }
\ No newline at end of file
@@ -0,0 +1,131 @@
+import threading
+from datetime import datetime, time, timedelta
+import numpy as np
+
+class ActualPriceBackfill:
+    """Fills Prediction.actual_price once the price store has the target bar
+    
+    A prediction made on day D is resolved with the close of the first bar dated
+    after D. Predictions are resolved per (symbol, prediction day) with a single
+    bulk UPDATE, and the error aggregates are updated in the same transaction.
+    Runs in a background thread, woken when the price store reports new data
+    and otherwise every interval seconds.
+    """
+    def __init__(self, app, db, prediction_model, stats, price_store):
+        self.app = app
+        self.db = db
+        self.prediction_model = prediction_model
+        self.stats = stats
+        self.price_store = price_store
+        self._pending = set()
+        self._run_all = True
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+    
+    def notify(self, symbols):
+        """Price store listener: resolve these symbols on the next pass"""
+        with self._lock:
+            self._pending.update(symbol.upper() for symbol in symbols)
+        self._wake.set()
+    
+    def start(self, interval=3600):
+        """Run a full pass now and then after every change or interval seconds"""
+        if self._thread is not None:
+            return
+        
+        def loop():
+            while not self._stop.is_set():
+                with self._lock:
+                    symbols = None if self._run_all else sorted(self._pending)
+                    self._pending.clear()
+                    self._run_all = False
+                try:
+                    self.run(symbols)
+                except Exception as e:
+                    print(f"Warning: actual price backfill failed: {e}")
+                if not self._wake.wait(interval):
+                    # Periodic pass: pick up anything missed, e.g. by another process
+                    with self._lock:
+                        self._run_all = True
+                self._wake.clear()
+        
+        self._thread = threading.Thread(target=loop, name='actual-price-backfill', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+    
+    def run(self, symbols=None):
+        """Resolve what can be resolved for symbols (all with pending predictions by default)"""
+        prediction = self.prediction_model
+        with self.app.app_context():
+            query = self.db.session.query(prediction.stock_symbol).filter(
+                prediction.actual_price.is_(None)).distinct()
+            if symbols is not None:
+                if not symbols:
+                    return 0
+                query = query.filter(self.db.func.upper(prediction.stock_symbol).in_(symbols))
+            stored_symbols = [row[0] for row in query.all()]
+            return sum(self.resolve_symbol(stock_symbol) for stock_symbol in stored_symbols)
+    
+    def resolve_symbol(self, stock_symbol):
+        """Resolve every pending prediction day of one symbol that has a later bar"""
+        series = self.price_store.get(stock_symbol)
+        if series is None or len(series) == 0:
+            return 0
+        days = series.dates.astype('datetime64[D]')
+        last_day = days[-1].astype(datetime)
+        
+        # Only days before the last bar can have a bar after them
+        prediction = self.prediction_model
+        prediction_day = self.db.func.date(prediction.prediction_date)
+        pending_days = self.db.session.query(prediction_day).filter(
+            prediction.stock_symbol == stock_symbol,
+            prediction.actual_price.is_(None),
+            prediction.prediction_date < datetime.combine(last_day, time())
+        ).distinct().all()
+        
+        resolved = 0
+        for (day,) in pending_days:
+            day = datetime.strptime(str(day)[:10], '%Y-%m-%d').date()
+            target = np.searchsorted(days, np.datetime64(day, 'D'), side='right')
+            if target < len(days):
+                resolved += self._resolve_day(stock_symbol, day, float(series.close[target]))
+        return resolved
+    
+    def _resolve_day(self, stock_symbol, day, actual_price):
+        """Set actual_price for one symbol's predictions made on day with one UPDATE"""
+        prediction = self.prediction_model
+        start = datetime.combine(day, time())
+        bucket = (
+            prediction.stock_symbol == stock_symbol,
+            prediction.actual_price.is_(None),
+            prediction.prediction_date >= start,
+            prediction.prediction_date < start + timedelta(days=1)
+        )
+        
+        # Aggregate the errors of the rows about to be resolved, then resolve them
+        relative_error = self.db.func.abs(prediction.predicted_price - actual_price) / actual_price
+        groups = self.db.session.query(
+            prediction.user_id,
+            prediction.model_used,
+            self.db.func.count(prediction.id),
+            self.db.func.sum(relative_error)
+        ).filter(*bucket).group_by(prediction.user_id, prediction.model_used).all()
+        expected = sum(count for _, _, count, _ in groups)
+        
+        updated = self.db.session.execute(
+            self.db.update(prediction).where(*bucket).values(actual_price=actual_price)
+        ).rowcount
+        if updated != expected:
+            # Another process resolved some of these rows meanwhile; its aggregates cover them
+            self.db.session.rollback()
+            return 0
+        
+        for user_id, model_used, count, error_sum in groups:
+            self.stats.record_resolved(user_id, stock_symbol, model_used, count, float(error_sum))
+        self.db.session.commit()
+        return updated
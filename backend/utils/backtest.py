@@ -0,0 +1,264 @@
+import os
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import numpy as np
+from utils.process_pool import worker_pool
+
+BACKTEST_MODES = ('expanding', 'rolling')
+
+# A chain needs a second fold to warm-start, so folds are never spread thinner than this
+MIN_CHAIN_FOLDS = 2
+
+def walk_forward_folds(n, n_folds=5, min_train=None, mode='expanding'):
+    """Split n time-ordered samples into walk-forward (train_start, train_end, test_end) folds
+    
+    Each fold trains on samples [train_start, train_end) and is tested on
+    [train_end, test_end), the next block nobody has trained on yet. Expanding
+    folds always start training at 0; rolling folds keep a window of min_train
+    samples. min_train defaults to half the samples.
+    """
+    if mode not in BACKTEST_MODES:
+        raise ValueError(f"Mode must be one of {', '.join(BACKTEST_MODES)}")
+    min_train = min_train or n // 2
+    test_size = (n - min_train) // n_folds
+    if n_folds < 1 or min_train < 1 or test_size < 1:
+        raise ValueError(f"Not enough data for {n_folds} folds: {n} samples, {min_train} for training")
+    
+    folds = []
+    for fold in range(n_folds):
+        train_end = min_train + fold * test_size
+        test_end = n if fold == n_folds - 1 else train_end + test_size
+        train_start = 0 if mode == 'expanding' else train_end - min_train
+        folds.append((train_start, train_end, test_end))
+    return folds
+
+def backtest_metrics(predicted, actual, previous, fold_ids, n_folds, tolerance=0.02):
+    """Overall and per-fold MAE, MAPE, directional accuracy and hit rate
+    
+    previous is the last known close when each prediction was made, so a
+    direction is right when predicted and actual moved the same way from it.
+    The hit rate is the share of predictions within tolerance (relative) of the
+    actual close. Computed over all folds at once; per-fold means use bincount.
+    """
+    error = np.abs(predicted - actual)
+    relative = error / np.abs(actual)
+    direction = np.sign(predicted - previous) == np.sign(actual - previous)
+    hit = relative <= tolerance
+    columns = {'mae': error, 'mape': relative * 100, 'directional_accuracy': direction, 'hit_rate': hit}
+    
+    counts = np.bincount(fold_ids, minlength=n_folds)
+    overall = {name: float(values.mean()) for name, values in columns.items()}
+    overall['predictions'] = int(len(actual))
+    per_fold = {name: np.bincount(fold_ids, weights=values, minlength=n_folds) / np.maximum(counts, 1)
+                for name, values in columns.items()}
+    folds = [dict({name: float(per_fold[name][fold]) for name in columns}, predictions=int(counts[fold]))
+             for fold in range(n_folds)]
+    return overall, folds
+
+def _linear_chain(df, folds):
+    """One-step-ahead predictions of the linear model for consecutive folds
+    
+    Uses the model's own features and same-day close target and solves the
+    least squares fit from its normal equations. Between folds the X'X and X'y
+    sums are warm-started: only rows entering (and, when rolling, leaving) the
+    training window are added or subtracted. Ordinary least squares does not
+    depend on the feature scale, so features are standardized once up front to
+    keep the sums well conditioned.
+    """
+    from models.linear_regression_model import LinearRegressionModel
+    
+    X, y = LinearRegressionModel().prepare_features(df)
+    X = X.values.astype(np.float64)
+    y = y.values.astype(np.float64)
+    X = (X - X.mean(axis=0)) / np.where(X.std(axis=0) > 0, X.std(axis=0), 1.0)
+    Z = np.hstack([X, np.ones((len(X), 1))])
+    
+    gram = np.zeros((Z.shape[1], Z.shape[1]))
+    moment = np.zeros(Z.shape[1])
+    start = end = folds[0][0]
+    results = []
+    for train_start, train_end, test_end in folds:
+        if train_start < start or train_end < end:
+            raise ValueError("Folds must move forward")
+        gram += Z[end:train_end].T @ Z[end:train_end]
+        moment += Z[end:train_end].T @ y[end:train_end]
+        gram -= Z[start:train_start].T @ Z[start:train_start]
+        moment -= Z[start:train_start].T @ y[start:train_start]
+        start, end = train_start, train_end
+        
+        coef = np.linalg.lstsq(gram, moment, rcond=None)[0]
+        # Prediction made on row i is for the close of row i + 1
+        rows = np.arange(train_end, test_end)
+        results.append((Z[rows] @ coef, y[rows + 1], y[rows]))
+    return results
+
+def _lstm_chain(df, folds, epochs=20, warm_epochs=5, batch_size=32):
+    """One-step-ahead predictions of the LSTM model for consecutive folds
+    
+    The first fold trains a fresh network for epochs; later folds continue from
+    the previous fold's weights for warm_epochs on their own training window.
+    The scaler is refit on each training window only, and only the fold's own
+    closes are scaled.
+    """
+    from models.lstm_model import LSTMModel
+    from utils.preprocessing import PriceScaler
+    from utils.windows import make_windows
+    
+    template = LSTMModel()
+    lookback = template.lookback
+    close = df['Close'].values.astype(np.float64)
+    network = None
+    results = []
+    for train_start, train_end, test_end in folds:
+        # Sample i is the window of closes i .. i + lookback - 1 predicting close i + lookback
+        scaler = PriceScaler().fit(close[train_start:train_end + lookback])
+        scaled = scaler.transform(close[train_start:test_end + lookback])
+        X_train, y_train = make_windows(scaled[:train_end - train_start + lookback], lookback)
+        X_test, _ = make_windows(scaled[train_end - train_start:], lookback)
+        
+        if network is None:
+            network = template.build_model()
+            network.fit(X_train, y_train, epochs=epochs, batch_size=batch_size, verbose=0)
+        else:
+            network.fit(X_train, y_train, epochs=warm_epochs, batch_size=batch_size, verbose=0)
+        
+        predicted = scaler.inverse_transform(network.predict(X_test, verbose=0)[:, 0])
+        targets = np.arange(train_end, test_end) + lookback
+        results.append((predicted, close[targets], close[targets - 1]))
+    return results
+
+def backtest_samples(df, model_type):
+    """Number of one-step-ahead predictions a walk-forward run can make on df"""
+    if model_type == 'lstm':
+        from models.lstm_model import LSTMModel
+        return len(df) - LSTMModel().lookback
+    from models.linear_regression_model import LinearRegressionModel
+    # One per feature row except the last, which has no next close
+    return len(LinearRegressionModel().prepare_features(df)[0]) - 1
+
+def _run_chain(df, model_type, folds, train_kwargs):
+    """Process pool entry point: results for a chain of consecutive folds"""
+    if model_type == 'lstm':
+        return _lstm_chain(df, folds, **train_kwargs)
+    return _linear_chain(df, folds)
+
+def walk_forward(df, model_type, mode='expanding', n_folds=5, min_train=None, processes=None,
+                 tolerance=0.02, train_kwargs=None):
+    """Walk-forward backtest of one model type on a price frame
+    
+    LSTM folds are split into up to processes contiguous chains of at least
+    MIN_CHAIN_FOLDS folds that run in a process pool; inside a chain each fold
+    warm-starts from the previous one. Returns a dict with the fold boundaries
+    (as dates), overall and per-fold metrics; the overall metrics include the
+    number of folds in each chain.
+    """
+    n_samples = backtest_samples(df, model_type)
+    folds = walk_forward_folds(n_samples, n_folds, min_train, mode)
+    processes = max(1, min(processes or os.cpu_count() or 1, len(folds) // MIN_CHAIN_FOLDS))
+    if model_type != 'lstm':
+        # Warm-started least squares takes about a second; workers would only add start-up time
+        processes = 1
+    chains = [[tuple(int(i) for i in fold) for fold in chain]
+              for chain in np.array_split(np.array(folds), processes)]
+    
+    if processes == 1:
+        chain_results = [_run_chain(df, model_type, chains[0], train_kwargs or {})]
+    else:
+        with worker_pool(processes, max(1, (os.cpu_count() or 1) // processes)) as pool:
+            chain_results = list(pool.map(_run_chain, [df] * processes, [model_type] * processes,
+                                          chains, [train_kwargs or {}] * processes))
+    
+    results = [result for chain in chain_results for result in chain]
+    predicted, actual, previous = (np.concatenate(parts) for parts in zip(*results))
+    fold_ids = np.repeat(np.arange(len(results)), [len(part[0]) for part in results])
+    overall, fold_metrics = backtest_metrics(predicted, actual, previous, fold_ids, len(folds), tolerance)
+    overall['chains'] = [len(chain) for chain in chains]
+    
+    # Report fold boundaries as dates: the first training sample's day, then the
+    # first and last closes predicted in the test block
+    dates = df['Date'].values
+    first_day = len(df) - n_samples - 1
+    for metrics, (train_start, train_end, test_end) in zip(fold_metrics, folds):
+        metrics['train_start'] = str(dates[first_day + train_start])[:10]
+        metrics['test_start'] = str(dates[first_day + train_end + 1])[:10]
+        metrics['test_end'] = str(dates[first_day + test_end])[:10]
+    return {'metrics': overall, 'folds': fold_metrics}
+
+class BacktestQueue:
+    """Runs walk-forward backtests in the background and stores them as run rows
+    
+    Runs are stored through run_model (a SQLAlchemy model) with their
+    parameters, metrics and per-fold results. A request matching a completed
+    or active run for the same data version and parameters returns that run.
+    """
+    ACTIVE_STATUSES = ('queued', 'running')
+    
+    def __init__(self, app, db, run_model, data_loader, processes=None):
+        self.app = app
+        self.db = db
+        self.run_model = run_model
+        self.data_loader = data_loader
+        self.processes = processes
+        # One backtest at a time; each one already spreads its folds over processes
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='backtest')
+        self._lock = threading.Lock()
+    
+    def submit(self, stock_symbol, model_type, data_version, params, user_id=None):
+        """Queue a backtest, or return the run already covering the same request"""
+        params_json = json.dumps(params, sort_keys=True)
+        with self._lock:
+            run = self.run_model.query.filter(
+                self.run_model.stock_symbol == stock_symbol.upper(),
+                self.run_model.model_type == model_type,
+                self.run_model.data_version == data_version,
+                self.run_model.params == params_json,
+                self.run_model.status.in_(self.ACTIVE_STATUSES + ('completed',))
+            ).first()
+            if run:
+                return run
+            
+            run = self.run_model(
+                stock_symbol=stock_symbol.upper(),
+                model_type=model_type,
+                data_version=data_version,
+                params=params_json,
+                status='queued',
+                user_id=user_id
+            )
+            self.db.session.add(run)
+            self.db.session.commit()
+            self.executor.submit(self._run, run.id)
+            return run
+    
+    def recover(self):
+        """Fail runs left queued or running by a previous process"""
+        stale = self.run_model.query.filter(self.run_model.status.in_(self.ACTIVE_STATUSES)).all()
+        for run in stale:
+            run.status = 'failed'
+            run.error = 'Interrupted by server restart'
+            run.finished_at = datetime.utcnow()
+        self.db.session.commit()
+        return len(stale)
+    
+    def _run(self, run_id):
+        """Worker entry point: backtest and record the outcome of one run"""
+        with self.app.app_context():
+            run = self.db.session.get(self.run_model, run_id)
+            run.status = 'running'
+            run.started_at = datetime.utcnow()
+            self.db.session.commit()
+            
+            try:
+                df = self.data_loader(run.stock_symbol)
+                result = walk_forward(df, run.model_type, processes=self.processes, **json.loads(run.params))
+                run.metrics = json.dumps(result['metrics'])
+                run.folds = json.dumps(result['folds'])
+                run.status = 'completed'
+            except Exception as e:
+                run.status = 'failed'
+                run.error = str(e)
+            finally:
+                run.finished_at = datetime.utcnow()
+                self.db.session.commit()
@@ -0,0 +1,163 @@
+"""Fixed-width binary storage for OHLCV history
+
+File layout (little endian):
+    magic            8 bytes   b'OHLCV\\x00\\x01\\x00'
+    header length    4 bytes   uint32
+    header           JSON      symbol metadata, row count and column offsets
+    padding          up to HEADER_SIZE bytes
+    Date             int64     datetime64[ns], sorted ascending (the date index)
+    OHLC             float64   4 x rows block: Open, High, Low, Close rows
+    Volume           int64
+
+Every column is contiguous and 64-byte aligned, so each one can be memory
+mapped on its own and slicing the last N rows only touches those pages.
+
+Convert existing CSV files with:
+    python -m utils.binary_store data/
+
+The CSV stays the source of truth: PriceStore rebuilds a binary file whenever
+its CSV has been modified since the conversion.
+"""
+import os
+import sys
+import json
+import argparse
+from datetime import datetime
+import pandas as pd
+import numpy as np
+
+MAGIC = b'OHLCV\x00\x01\x00'
+HEADER_SIZE = 4096
+ALIGNMENT = 64
+BINARY_SUFFIX = '_data.ohlcv'
+CSV_SUFFIX = '_data.csv'
+
+class BinarySeriesFile:
+    """Memory-mapped, read-only view of one binary OHLCV file"""
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not an OHLCV binary file")
+            header_length = int(np.frombuffer(f.read(4), dtype='<u4')[0])
+            self.header = json.loads(f.read(header_length).decode('utf-8'))
+        
+        rows = self.header['rows']
+        self.stock_symbol = self.header['symbol']
+        self.dates = self._map('Date', (rows,))
+        self.ohlc = self._map('OHLC', (4, rows))
+        self.volume = self._map('Volume', (rows,))
+    
+    def __len__(self):
+        return self.header['rows']
+    
+    def _map(self, name, shape):
+        column = self.header['columns'][name]
+        if shape[-1] == 0:
+            return np.empty(shape, dtype=column['dtype'])
+        return np.memmap(self.path, dtype=column['dtype'], mode='r',
+                         offset=column['offset'], shape=shape)
+    
+    def to_frame(self):
+        """DataFrame backed by the memory map"""
+        return pd.DataFrame({
+            'Date': self.dates,
+            'Open': self.ohlc[0],
+            'High': self.ohlc[1],
+            'Low': self.ohlc[2],
+            'Close': self.ohlc[3],
+            'Volume': self.volume
+        }, copy=False)
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+def write_binary(path, stock_symbol, dates, ohlc, volume):
+    """Write arrays to path atomically in the binary OHLCV layout"""
+    dates = np.ascontiguousarray(dates, dtype='datetime64[ns]')
+    ohlc = np.ascontiguousarray(ohlc, dtype='<f8')
+    volume = np.ascontiguousarray(volume, dtype='<i8')
+    rows = len(dates)
+    if ohlc.shape != (4, rows) or volume.shape != (rows,):
+        raise ValueError("OHLC must be shaped (4, rows) and volume (rows,)")
+    
+    columns = {}
+    offset = HEADER_SIZE
+    for name, array in (('Date', dates), ('OHLC', ohlc), ('Volume', volume)):
+        columns[name] = {'dtype': array.dtype.str, 'offset': offset}
+        offset = _align(offset + array.nbytes)
+    
+    header = {
+        'symbol': stock_symbol.upper(),
+        'rows': rows,
+        'columns': columns,
+        'first_date': str(dates[0]) if rows else None,
+        'last_date': str(dates[-1]) if rows else None,
+        'created_at': datetime.utcnow().isoformat()
+    }
+    header_bytes = json.dumps(header).encode('utf-8')
+    if len(MAGIC) + 4 + len(header_bytes) > HEADER_SIZE:
+        raise ValueError("Binary header too large")
+    
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(np.uint32(len(header_bytes)).astype('<u4').tobytes())
+        f.write(header_bytes)
+        for name, array in (('Date', dates.view('<i8')), ('OHLC', ohlc), ('Volume', volume)):
+            f.seek(columns[name]['offset'])
+            f.write(array.tobytes())
+    os.replace(tmp_path, path)
+
+def convert_csv(csv_path, binary_path=None, stock_symbol=None):
+    """Convert one CSV file (Date, Open, High, Low, Close, Volume) to binary"""
+    if binary_path is None:
+        binary_path = csv_path[:-len(CSV_SUFFIX)] + BINARY_SUFFIX if csv_path.endswith(CSV_SUFFIX) \
+            else os.path.splitext(csv_path)[0] + '.ohlcv'
+    if stock_symbol is None:
+        stock_symbol = os.path.basename(csv_path).split('_')[0]
+    
+    df = pd.read_csv(csv_path, parse_dates=['Date'])
+    df = df.sort_values('Date', kind='stable')
+    write_binary(
+        binary_path,
+        stock_symbol,
+        df['Date'].values,
+        df[['Open', 'High', 'Low', 'Close']].values.T,
+        df['Volume'].values
+    )
+    return binary_path
+
+def is_stale(binary_path, csv_path):
+    """Whether csv_path was modified after binary_path was written from it"""
+    return os.path.exists(csv_path) and os.stat(csv_path).st_mtime_ns > os.stat(binary_path).st_mtime_ns
+
+def convert_directory(data_path, force=False):
+    """Convert every *_data.csv in data_path whose binary file is missing or older"""
+    converted = []
+    for name in sorted(os.listdir(data_path)):
+        if not name.endswith(CSV_SUFFIX):
+            continue
+        csv_path = os.path.join(data_path, name)
+        binary_path = csv_path[:-len(CSV_SUFFIX)] + BINARY_SUFFIX
+        if not force and os.path.exists(binary_path) and not is_stale(binary_path, csv_path):
+            continue
+        converted.append(convert_csv(csv_path, binary_path))
+    return converted
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convert OHLCV CSV files to the binary format')
+    parser.add_argument('paths', nargs='+', help='CSV files or directories of *_data.csv files')
+    parser.add_argument('--force', action='store_true', help='Rewrite binary files that are up to date')
+    args = parser.parse_args(argv)
+    
+    for path in args.paths:
+        if os.path.isdir(path):
+            outputs = convert_directory(path, force=args.force)
+        else:
+            outputs = [convert_csv(path)]
+        for output in outputs:
+            print(f"Wrote {output}")
+
+if __name__ == '__main__':
+    sys.exit(main())
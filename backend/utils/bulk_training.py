@@ -0,0 +1,118 @@
+"""Train models for many symbols in parallel worker processes
+
+Fans model training out over a process pool with one math/TensorFlow thread
+per worker, longest jobs first, and writes each model into the model store:
+
+    python -m utils.bulk_training                       # every symbol, both model types
+    python -m utils.bulk_training TCS WIPRO --model-types lstm --processes 4
+    python -m utils.bulk_training --force               # full retrain, even of current models
+
+Models trained on an earlier version of a symbol's data are updated with the
+new bars rather than retrained, unless --force is given.
+
+The API queues the same work through TrainingQueue.submit_bulk.
+"""
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import as_completed
+
+# Relative cost of a training row per model type, for longest-first scheduling
+MODEL_COST = {'lstm': 100, 'linear': 1}
+
+def plan(price_store, registry, symbols, model_types, force=False):
+    """(stock_symbol, model_type, data_version) jobs to run, most expensive first
+    
+    Models already trained on the current data are skipped unless force is set;
+    symbols without data are skipped.
+    """
+    jobs = []
+    for stock_symbol in symbols:
+        series = price_store.get(stock_symbol)
+        if series is None:
+            continue
+        for model_type in model_types:
+            if force or not registry.is_available(stock_symbol, model_type, series.version):
+                jobs.append((len(series) * MODEL_COST.get(model_type, 1), stock_symbol.upper(), model_type,
+                             series.version))
+    jobs.sort(key=lambda job: job[0], reverse=True)
+    return [job[1:] for job in jobs]
+
+def _train_one(store_path, stock_symbol, model_type, data_version, df, full, train_kwargs):
+    """Worker entry point: bring one model up to date and write it to the store"""
+    from models.model_registry import ModelRegistry
+    
+    start = time.perf_counter()
+    # Nothing is served from this process, so keep no models in memory
+    ModelRegistry(store_path, max_loaded=0).refresh(stock_symbol, model_type, data_version, df, full=full,
+                                                   **train_kwargs)
+    return time.perf_counter() - start
+
+def train_many(store_path, jobs, data_loader, processes=None, full=False, train_kwargs=None):
+    """Train jobs from plan() in a process pool and yield results as they finish
+    
+    Models with an earlier version are updated incrementally unless full is set
+    (see ModelRegistry.refresh).
+    Each result is (stock_symbol, model_type, data_version, seconds, error),
+    with error None on success. Workers are spawned with one thread each, so
+    at most processes cores are busy.
+    """
+    from utils.process_pool import worker_pool
+    
+    if not jobs:
+        return
+    processes = max(1, min(processes or os.cpu_count() or 1, len(jobs)))
+    with worker_pool(processes, threads_per_worker=1) as pool:
+        # The pool starts jobs in submission order, so the longest ones start first
+        futures = {}
+        for stock_symbol, model_type, data_version in jobs:
+            future = pool.submit(_train_one, store_path, stock_symbol, model_type, data_version,
+                                 data_loader(stock_symbol), full, (train_kwargs or {}).get(model_type, {}))
+            futures[future] = (stock_symbol, model_type, data_version)
+        
+        for future in as_completed(futures):
+            try:
+                yield futures[future] + (future.result(), None)
+            except Exception as e:
+                yield futures[future] + (None, str(e))
+
+def main(argv=None):
+    from models.model_registry import ModelRegistry
+    from utils.price_store import PriceStore
+    
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('symbols', nargs='*', help='symbols to train (default: every symbol in the data path)')
+    parser.add_argument('--model-types', nargs='+', default=['lstm', 'linear'], choices=['lstm', 'linear'])
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--force', action='store_true', help='retrain models already trained on the current data')
+    parser.add_argument('--max-epochs', type=int, default=50, help='LSTM epoch budget per model')
+    parser.add_argument('--max-seconds', type=float, help='LSTM wall-clock budget per model')
+    parser.add_argument('--store', default=os.environ.get('MODEL_STORE_PATH', 'model_store/'))
+    parser.add_argument('--data', default='data/')
+    args = parser.parse_args(argv)
+    
+    price_store = PriceStore(args.data)
+    symbols = args.symbols or price_store.load_all()
+    registry = ModelRegistry(args.store)
+    jobs = plan(price_store, registry, symbols, args.model_types, args.force)
+    print(f"Training {len(jobs)} models in {min(args.processes, len(jobs)) or 0} processes")
+    
+    def load_frame(stock_symbol):
+        return price_store.get(stock_symbol).frame
+    
+    start = time.perf_counter()
+    failed = 0
+    train_kwargs = {'lstm': {'epochs': args.max_epochs, 'max_seconds': args.max_seconds}}
+    results = train_many(args.store, jobs, load_frame, args.processes, full=args.force, train_kwargs=train_kwargs)
+    for stock_symbol, model_type, data_version, seconds, error in results:
+        if error:
+            failed += 1
+            print(f"  FAILED {stock_symbol} {model_type}: {error}")
+        else:
+            print(f"  {stock_symbol} {model_type} trained in {seconds:.1f}s")
+    print(f"Done in {time.perf_counter() - start:.1f}s, {failed} failed")
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
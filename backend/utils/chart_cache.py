@@ -0,0 +1,65 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+class ChartCache:
+    """Serialized chart payloads keyed by (symbol, chart type, data version, params)
+    
+    Stores the final response bytes with a strong ETag computed from them, so a
+    repeat request is a dictionary lookup (and a 304 when the client already has
+    it). Entries are evicted least recently used first once either max_entries
+    or max_bytes is exceeded.
+    """
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_entries=256):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def make_key(stock_symbol, chart_type, data_version, **params):
+        """Build a cache key; params are any request options that change the payload"""
+        return (stock_symbol.upper(), chart_type, data_version, tuple(sorted(params.items())))
+    
+    @staticmethod
+    def etag_for(body):
+        return hashlib.blake2b(body, digest_size=16).hexdigest()
+    
+    def get(self, key):
+        """Return (etag, body) for a key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+    
+    def put(self, key, body):
+        """Store a payload and return its (etag, body) entry"""
+        entry = (self.etag_for(body), body)
+        with self._lock:
+            # Payloads for older data versions of the same chart can never be served again
+            stale = [other for other in self._entries
+                     if other[:2] == key[:2] and other[2] != key[2]]
+            for other in stale:
+                self._discard(other)
+            
+            if key in self._entries:
+                self._discard(key)
+            if len(body) > self.max_bytes:
+                return entry
+            
+            self._entries[key] = entry
+            self.size += len(body)
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                self._discard(next(iter(self._entries)))
+        return entry
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+    
+    def _discard(self, key):
+        etag, body = self._entries.pop(key)
+        self.size -= len(body)
@@ -1,11 +1,29 @@
+import importlib.util
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
+import plotly.io as pio
 from plotly.subplots import make_subplots
 import json
+from utils.downsampling import downsample_line, resample_ohlc
+
+# orjson (in requirements.txt) encodes NumPy arrays directly and is much faster than json;
+# fall back to json where it is not installed
+JSON_ENGINE = 'orjson' if importlib.util.find_spec('orjson') else 'json'
+
+def figure_json(fig):
+    """Encode a figure to JSON bytes in a single pass"""
+    # The figure was validated as it was built, so skip plotly's second validation
+    return pio.to_json(fig, validate=False, engine=JSON_ENGINE).encode('utf-8')
+
+def combine_charts(charts):
+    """Join encoded charts into one JSON object keyed by name without re-parsing them"""
+    members = [json.dumps(name).encode('utf-8') + b':' + body for name, body in charts.items()]
+    return b'{' + b','.join(members) + b'}'
 
 class ChartGenerator:
+    """Builds Plotly figures for the chart endpoints, returned as encoded JSON bytes"""
     def __init__(self):
         self.colors = {
             'primary': '#1f77b4',
@@ -16,8 +34,9 @@ class ChartGenerator:
             'info': '#17a2b8'
         }
     
-    def create_line_chart(self, df, stock_symbol):
-        """Create a line chart showing price trends"""
+    def create_line_chart(self, df, stock_symbol, max_points=None):
+        """Create a line chart showing price trends, LTTB-downsampled to max_points"""
+        df = downsample_line(df, max_points)
         fig = go.Figure()
         
         # Add closing price line
@@ -58,10 +77,11 @@ class ChartGenerator:
             height=500
         )
         
-        return json.loads(fig.to_json())
+        return figure_json(fig)
     
-    def create_candlestick_chart(self, df, stock_symbol):
-        """Create a candlestick chart for OHLC data"""
+    def create_candlestick_chart(self, df, stock_symbol, resolution='daily', max_points=None):
+        """Create a candlestick chart for OHLC data, aggregated to resolution"""
+        df = resample_ohlc(df, resolution, max_points)
         fig = go.Figure(data=[go.Candlestick(
             x=df['Date'],
             open=df['Open'],
@@ -96,7 +116,7 @@ class ChartGenerator:
             height=600
         )
         
-        return json.loads(fig.to_json())
+        return figure_json(fig)
     
     def create_pie_chart(self, df, stock_symbol):
         """Create a pie chart showing price distribution"""
@@ -117,10 +137,11 @@ class ChartGenerator:
             height=400
         )
         
-        return json.loads(fig.to_json())
+        return figure_json(fig)
     
-    def create_technical_indicators_chart(self, df, stock_symbol):
-        """Create a chart with technical indicators"""
+    def create_technical_indicators_chart(self, df, stock_symbol, max_points=None):
+        """Create a chart with technical indicators, LTTB-downsampled to max_points"""
+        df = downsample_line(df, max_points)
         fig = make_subplots(
             rows=3, cols=1,
             shared_xaxes=True,
@@ -195,10 +216,11 @@ class ChartGenerator:
             showlegend=True
         )
         
-        return json.loads(fig.to_json())
+        return figure_json(fig)
     
-    def create_prediction_chart(self, df, prediction_data, stock_symbol):
+    def create_prediction_chart(self, df, prediction_data, stock_symbol, max_points=None):
         """Create a chart showing actual vs predicted prices"""
+        df = downsample_line(df, max_points)
         fig = go.Figure()
         
         # Add actual prices
@@ -210,8 +232,37 @@ class ChartGenerator:
             line=dict(color=self.colors['primary'], width=2)
         ))
         
-        # Add predicted price point
-        if prediction_data:
+        # Add the forecast path with its confidence band, or the single predicted point
+        if prediction_data and prediction_data.get('forecast'):
+            forecast = prediction_data['forecast']
+            fig.add_trace(go.Scatter(
+                x=forecast['dates'],
+                y=forecast['upper_bound'],
+                mode='lines',
+                name='Upper Bound',
+                line=dict(width=0),
+                showlegend=False
+            ))
+            
+            fig.add_trace(go.Scatter(
+                x=forecast['dates'],
+                y=forecast['lower_bound'],
+                mode='lines',
+                name='Confidence Band',
+                line=dict(width=0),
+                fill='tonexty',
+                fillcolor='rgba(44, 160, 44, 0.2)'
+            ))
+            
+            fig.add_trace(go.Scatter(
+                x=forecast['dates'],
+                y=forecast['predicted_prices'],
+                mode='lines+markers',
+                name=f"{forecast['horizon']}-Day Forecast",
+                line=dict(color=self.colors['success'], width=2, dash='dot'),
+                marker=dict(size=4)
+            ))
+        elif prediction_data:
             pred_date = pd.Timestamp.now() + pd.Timedelta(days=1)
             fig.add_trace(go.Scatter(
                 x=[pred_date],
@@ -230,10 +281,11 @@ class ChartGenerator:
             height=500
         )
         
-        return json.loads(fig.to_json())
+        return figure_json(fig)
     
-    def create_volume_chart(self, df, stock_symbol):
-        """Create a volume analysis chart"""
+    def create_volume_chart(self, df, stock_symbol, resolution='daily', max_points=None):
+        """Create a volume analysis chart, aggregated to resolution"""
+        df = resample_ohlc(df, resolution, max_points)
         fig = make_subplots(
             rows=2, cols=1,
             shared_xaxes=True,
@@ -270,7 +322,7 @@ class ChartGenerator:
             showlegend=False
         )
         
-        return json.loads(fig.to_json())
+        return figure_json(fig)
     
     def create_statistics_dashboard(self, df, stock_symbol):
         """Create a comprehensive statistics dashboard"""
@@ -351,4 +403,4 @@ class ChartGenerator:
             template='plotly_white'
         )
         
-        return json.loads(fig.to_json())
\ No newline at end of file
+        return figure_json(fig)
\ No newline at end of file
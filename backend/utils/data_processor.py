@@ -2,15 +2,21 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import os
+from utils.binary_store import BinarySeriesFile, BINARY_SUFFIX, is_stale
+from utils.indicators import compute_indicators
 
 class DataProcessor:
     def __init__(self):
         self.data_path = 'data/'
         
     def load_stock_data(self, stock_symbol):
-        """Load stock data from CSV file"""
+        """Load stock data, memory-mapping the binary file when it is up to date with the CSV"""
         try:
+            binary_path = f"{self.data_path}{stock_symbol.lower()}{BINARY_SUFFIX}"
             file_path = f"{self.data_path}{stock_symbol.lower()}_data.csv"
+            if os.path.exists(binary_path) and not is_stale(binary_path, file_path):
+                return BinarySeriesFile(binary_path).to_frame()
+            
             if not os.path.exists(file_path):
                 raise FileNotFoundError(f"Data file for {stock_symbol} not found")
             
@@ -40,41 +46,11 @@ class DataProcessor:
     
     def add_technical_indicators(self, df):
         """Add technical indicators to the dataframe"""
-        # Moving averages
-        df['MA_5'] = df['Close'].rolling(window=5).mean()
-        df['MA_10'] = df['Close'].rolling(window=10).mean()
-        df['MA_20'] = df['Close'].rolling(window=20).mean()
-        df['MA_50'] = df['Close'].rolling(window=50).mean()
-        
-        # Price changes
-        df['Price_Change'] = df['Close'].pct_change()
-        df['Price_Change_5'] = df['Close'].pct_change(periods=5)
-        
-        # Volatility
-        df['Volatility'] = df['Close'].rolling(window=20).std()
-        
-        # RSI
-        delta = df['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        df['RSI'] = 100 - (100 / (1 + rs))
-        
-        # Bollinger Bands
-        bb_20 = df['Close'].rolling(window=20).mean()
-        bb_std = df['Close'].rolling(window=20).std()
-        df['BB_Upper'] = bb_20 + (bb_std * 2)
-        df['BB_Lower'] = bb_20 - (bb_std * 2)
-        
-        # MACD
-        exp1 = df['Close'].ewm(span=12).mean()
-        exp2 = df['Close'].ewm(span=26).mean()
-        df['MACD'] = exp1 - exp2
-        df['Signal'] = df['MACD'].ewm(span=9).mean()
-        
-        # Volume indicators
-        df['Volume_MA'] = df['Volume'].rolling(window=20).mean()
-        df['Volume_Ratio'] = df['Volume'] / df['Volume_MA']
+        indicators = compute_indicators(df['Close'].values, df['Volume'].values)
+        for column in ['MA_5', 'MA_10', 'MA_20', 'MA_50', 'Price_Change', 'Price_Change_5',
+                       'Volatility', 'RSI', 'BB_Upper', 'BB_Lower', 'MACD', 'Signal',
+                       'Volume_MA', 'Volume_Ratio']:
+            df[column] = indicators[column]
         
         return df
     
@@ -0,0 +1,46 @@
+import os
+import sqlite3
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DEFAULT_DATABASE_URI = 'sqlite:///stock_prediction.db'
+
+def database_uri():
+    """Database URI from DATABASE_URL, SQLite in the instance folder by default"""
+    uri = os.environ.get('DATABASE_URL', DEFAULT_DATABASE_URI)
+    # Some hosting providers still hand out the pre-SQLAlchemy 1.4 scheme
+    if uri.startswith('postgres://'):
+        uri = 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+def engine_options(uri):
+    """SQLAlchemy engine options for the configured backend
+    
+    Server databases get a connection pool sized by DB_POOL_SIZE and
+    DB_MAX_OVERFLOW, with pre-ping and recycling so dropped connections are
+    replaced. SQLite keeps its default pool and waits on a locked database
+    instead of failing right away.
+    """
+    if uri.startswith('sqlite'):
+        return {'connect_args': {'timeout': float(os.environ.get('SQLITE_BUSY_TIMEOUT', 30))}}
+    return {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': float(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': True
+    }
+
+@event.listens_for(Engine, 'connect')
+def _configure_sqlite(dbapi_connection, connection_record):
+    """Use WAL on SQLite so readers never block on the writer
+    
+    synchronous=NORMAL is durable across application crashes in WAL mode and
+    avoids an fsync on every commit.
+    """
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.close()
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+
+RESOLUTIONS = ('daily', 'weekly', 'monthly')
+
+def lttb_indices(y, max_points, x=None):
+    """Row indices kept by largest-triangle-three-buckets downsampling
+    
+    The first and last points are always kept. The points in between are split
+    into max_points - 2 buckets, and each bucket keeps the point forming the
+    largest triangle with the previously kept point and the next bucket's
+    average. x defaults to the row position.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+    x = np.arange(n, dtype=np.float64) if x is None else np.asarray(x, dtype=np.float64)
+    
+    # Bucket b covers rows edges[b]:edges[b + 1]
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    
+    # Bucket averages from prefix sums; the last bucket looks ahead to the last point
+    x_sums = np.concatenate([[0.0], np.cumsum(x)])
+    y_sums = np.concatenate([[0.0], np.cumsum(y)])
+    counts = np.diff(edges)
+    next_x = np.append(((x_sums[edges[1:]] - x_sums[edges[:-1]]) / counts)[1:], x[-1])
+    next_y = np.append(((y_sums[edges[1:]] - y_sums[edges[:-1]]) / counts)[1:], y[-1])
+    
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for b in range(max_points - 2):
+        lo, hi = edges[b], edges[b + 1]
+        # Twice the triangle area for every candidate in the bucket at once
+        area = np.abs((x[a] - next_x[b]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y[b] - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[b + 1] = a
+    return selected
+
+def downsample_line(df, max_points, column='Close'):
+    """Rows of df kept by LTTB on one column, with the other columns following"""
+    if max_points is None or len(df) <= max_points:
+        return df
+    x = df['Date'].values.astype('datetime64[ns]').astype(np.int64)
+    return df.iloc[lttb_indices(df[column].values, max_points, x)]
+
+def _periods(dates, resolution):
+    """Bucket label of each date for a resolution"""
+    days = np.asarray(dates).astype('datetime64[D]')
+    if resolution == 'weekly':
+        # NumPy weeks start on Thursday (the epoch); shift them to start on Monday
+        return (days - np.timedelta64(4, 'D')).astype('datetime64[W]')
+    if resolution == 'monthly':
+        return days.astype('datetime64[M]')
+    return days
+
+def _bucket_starts(periods):
+    return np.flatnonzero(np.concatenate([[True], periods[1:] != periods[:-1]]))
+
+def choose_resolution(dates, max_points):
+    """Finest resolution whose bar count fits in max_points, monthly at the coarsest"""
+    for resolution in RESOLUTIONS:
+        if len(_bucket_starts(_periods(dates, resolution))) <= max_points:
+            return resolution
+    return RESOLUTIONS[-1]
+
+def resample_ohlc(df, resolution='daily', max_points=None):
+    """Aggregate daily OHLCV rows into weekly or monthly bars
+    
+    resolution 'auto' picks the finest one that fits max_points. Each bar is
+    dated by its first trading day. When max_points is given and there are still
+    more bars, only the most recent max_points are kept.
+    """
+    if resolution == 'auto':
+        resolution = 'daily' if max_points is None else choose_resolution(df['Date'].values, max_points)
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"Resolution must be one of {', '.join(RESOLUTIONS)} or auto")
+    
+    if resolution != 'daily' and len(df):
+        starts = _bucket_starts(_periods(df['Date'].values, resolution))
+        ends = np.append(starts[1:], len(df)) - 1
+        df = pd.DataFrame({
+            'Date': df['Date'].values[starts],
+            'Open': df['Open'].values[starts],
+            'High': np.maximum.reduceat(df['High'].values, starts),
+            'Low': np.minimum.reduceat(df['Low'].values, starts),
+            'Close': df['Close'].values[ends],
+            'Volume': np.add.reduceat(df['Volume'].values, starts)
+        })
+    
+    if max_points is not None and len(df) > max_points:
+        df = df.iloc[-max_points:]
+    return df
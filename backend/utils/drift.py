@@ -0,0 +1,28 @@
+from collections import deque
+import numpy as np
+
+class DriftMonitor:
+    """Tracks a model's error on bars it was not fitted on against its validation error
+    
+    baseline is the mean relative error on the validation split at training
+    time. Incremental updates feed in the errors the model made on the new bars
+    before learning from them; once at least min_samples are recorded and the
+    mean of the last window exceeds factor times the baseline, the model has
+    drifted and needs a full retrain instead of another update.
+    """
+    def __init__(self, baseline, window=20, factor=2.0, min_samples=5):
+        self.baseline = float(baseline)
+        self.factor = factor
+        self.min_samples = min_samples
+        self.errors = deque(maxlen=window)
+    
+    def observe(self, errors):
+        self.errors.extend(float(error) for error in np.ravel(errors))
+    
+    @property
+    def recent_error(self):
+        return float(np.mean(self.errors)) if self.errors else None
+    
+    @property
+    def drifted(self):
+        return len(self.errors) >= self.min_samples and self.recent_error > self.factor * self.baseline
@@ -0,0 +1,36 @@
+import pandas as pd
+import numpy as np
+
+MAX_HORIZON = 60
+
+def validate_horizon(horizon):
+    """Parse a requested forecast horizon in days"""
+    horizon = int(horizon)
+    if not 1 <= horizon <= MAX_HORIZON:
+        raise ValueError(f"Horizon must be between 1 and {MAX_HORIZON} days")
+    return horizon
+
+def confidence_bands(prices, close, z=1.96, window=30):
+    """Band around a forecast path that widens with the square root of the step
+    
+    The spread is based on the standard deviation of recent daily price changes.
+    """
+    changes = np.diff(np.asarray(close, dtype=np.float64)[-(window + 1):])
+    daily_std = changes.std() if len(changes) else 0.0
+    spread = z * daily_std * np.sqrt(np.arange(1, len(prices) + 1))
+    return prices - spread, prices + spread
+
+def forecast_payload(df, prices):
+    """Describe a forecast path with dates and confidence bands for the API"""
+    prices = np.asarray(prices, dtype=np.float64)
+    lower, upper = confidence_bands(prices, df['Close'].values)
+    last_date = pd.Timestamp(df['Date'].iloc[-1])
+    dates = pd.date_range(last_date + pd.Timedelta(days=1), periods=len(prices), freq='D')
+    
+    return {
+        'horizon': len(prices),
+        'dates': [date.strftime('%Y-%m-%d') for date in dates],
+        'predicted_prices': np.round(prices, 2).tolist(),
+        'lower_bound': np.round(lower, 2).tolist(),
+        'upper_bound': np.round(upper, 2).tolist()
+    }
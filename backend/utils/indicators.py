@@ -0,0 +1,279 @@
+import threading
+from collections import deque
+import pandas as pd
+import numpy as np
+
+MA_WINDOWS = (5, 10, 20, 50)
+RSI_WINDOW = 14
+BB_WINDOW = 20
+VOLUME_WINDOW = 20
+MACD_SPANS = (12, 26)
+SIGNAL_SPAN = 9
+
+# Running sums are recomputed from their buffers this often to cancel float drift
+RESYNC_INTERVAL = 1000
+
+def compute_indicators(close, volume=None):
+    """Vectorized indicator columns over a full price history
+    
+    Returns a dict of NumPy arrays aligned with close. Used for backfills and
+    feature matrices; for the latest values only, use latest_indicators.
+    """
+    close = pd.Series(np.asarray(close, dtype=np.float64))
+    columns = {}
+    
+    # Moving averages
+    for window in MA_WINDOWS:
+        columns[f'MA_{window}'] = close.rolling(window=window).mean()
+    
+    # Price changes
+    columns['Price_Change'] = close.pct_change()
+    columns['Price_Change_5'] = close.pct_change(periods=5)
+    
+    # Volatility and Bollinger Bands
+    bb_std = close.rolling(window=BB_WINDOW).std()
+    columns['Volatility'] = bb_std
+    columns['BB_Upper'] = columns['MA_20'] + (bb_std * 2)
+    columns['BB_Lower'] = columns['MA_20'] - (bb_std * 2)
+    
+    # RSI
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=RSI_WINDOW).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=RSI_WINDOW).mean()
+    rs = gain / loss
+    columns['RSI'] = 100 - (100 / (1 + rs))
+    
+    # MACD
+    exp1 = close.ewm(span=MACD_SPANS[0]).mean()
+    exp2 = close.ewm(span=MACD_SPANS[1]).mean()
+    columns['MACD'] = exp1 - exp2
+    columns['Signal'] = columns['MACD'].ewm(span=SIGNAL_SPAN).mean()
+    
+    # Volume indicators
+    if volume is not None:
+        volume = pd.Series(np.asarray(volume, dtype=np.float64))
+        columns['Volume_MA'] = volume.rolling(window=VOLUME_WINDOW).mean()
+        columns['Volume_Ratio'] = volume / columns['Volume_MA']
+    
+    return {name: values.values for name, values in columns.items()}
+
+class _Ewm:
+    """Adjusted exponentially weighted mean, matching pandas ewm(span=...).mean()"""
+    def __init__(self, span):
+        self.decay = 1 - 2 / (span + 1)
+        self.numerator = 0.0
+        self.denominator = 0.0
+    
+    def update(self, value):
+        self.numerator = value + self.decay * self.numerator
+        self.denominator = 1 + self.decay * self.denominator
+        return self.value
+    
+    @property
+    def value(self):
+        return self.numerator / self.denominator if self.denominator else np.nan
+    
+    def seed(self, last_mean, count):
+        """Restore the accumulator from the mean over a history of count values"""
+        self.denominator = (1 - self.decay ** count) / (1 - self.decay)
+        self.numerator = last_mean * self.denominator
+
+class IndicatorState:
+    """Running indicator state for one price series, updated in O(1) per new bar
+    
+    Keeps rolling sums for the moving averages, RSI and volume average, a rolling
+    sum of squares for the Bollinger Band deviation and EWM accumulators for MACD.
+    snapshot() returns the same values as the last row of compute_indicators.
+    """
+    def __init__(self):
+        self.count = 0
+        self.first_close = None
+        self.closes = deque(maxlen=max(MA_WINDOWS) + 1)
+        self.volumes = deque(maxlen=VOLUME_WINDOW)
+        self.gains = deque(maxlen=RSI_WINDOW)
+        self.losses = deque(maxlen=RSI_WINDOW)
+        self._reset_sums()
+        self.fast = _Ewm(MACD_SPANS[0])
+        self.slow = _Ewm(MACD_SPANS[1])
+        self.signal = _Ewm(SIGNAL_SPAN)
+    
+    def _reset_sums(self):
+        self.sums = {window: 0.0 for window in MA_WINDOWS}
+        self.square_sum = 0.0
+        self.gain_sum = 0.0
+        self.loss_sum = 0.0
+        self.volume_sum = 0.0
+    
+    def _resync(self):
+        """Recompute the rolling sums exactly from the buffers"""
+        closes = np.array(self.closes)
+        for window in MA_WINDOWS:
+            self.sums[window] = float(closes[-window:].sum()) if len(closes) >= window else float(closes.sum())
+        tail = closes[-BB_WINDOW:]
+        self.square_sum = float((tail * tail).sum())
+        self.gain_sum = float(sum(self.gains))
+        self.loss_sum = float(sum(self.losses))
+        self.volume_sum = float(sum(self.volumes))
+    
+    def update(self, close, volume=np.nan):
+        """Append one bar"""
+        close = float(close)
+        if self.first_close is None:
+            self.first_close = close
+        
+        # RSI treats the undefined first change as neither a gain nor a loss
+        delta = close - self.closes[-1] if self.closes else 0.0
+        if len(self.gains) == RSI_WINDOW:
+            self.gain_sum -= self.gains[0]
+            self.loss_sum -= self.losses[0]
+        self.gains.append(max(delta, 0.0))
+        self.losses.append(max(-delta, 0.0))
+        self.gain_sum += self.gains[-1]
+        self.loss_sum += self.losses[-1]
+        
+        # Rolling sums drop the value leaving each window
+        for window in MA_WINDOWS:
+            if len(self.closes) >= window:
+                self.sums[window] -= self.closes[-window]
+            self.sums[window] += close
+        if len(self.closes) >= BB_WINDOW:
+            self.square_sum -= self.closes[-BB_WINDOW] ** 2
+        self.square_sum += close ** 2
+        self.closes.append(close)
+        
+        volume = float(volume)
+        if len(self.volumes) == VOLUME_WINDOW:
+            self.volume_sum -= self.volumes[0]
+        self.volumes.append(volume)
+        self.volume_sum += volume
+        
+        self.signal.update(self.fast.update(close) - self.slow.update(close))
+        
+        self.count += 1
+        if self.count % RESYNC_INTERVAL == 0:
+            self._resync()
+    
+    def continues(self, close):
+        """Check whether close is this state's history with zero or more bars appended"""
+        return (0 < self.count <= len(close)
+                and close[0] == self.first_close
+                and close[self.count - 1] == self.closes[-1])
+    
+    def snapshot(self):
+        """Latest indicator values, NaN where the history is too short"""
+        closes = self.closes
+        values = {}
+        for window in MA_WINDOWS:
+            values[f'MA_{window}'] = self.sums[window] / window if self.count >= window else np.nan
+        
+        values['Price_Change'] = closes[-1] / closes[-2] - 1 if self.count >= 2 else np.nan
+        values['Price_Change_5'] = closes[-1] / closes[-6] - 1 if self.count >= 6 else np.nan
+        
+        if self.count >= BB_WINDOW:
+            mean = self.sums[BB_WINDOW] / BB_WINDOW
+            variance = (self.square_sum - BB_WINDOW * mean * mean) / (BB_WINDOW - 1)
+            bb_std = np.sqrt(max(variance, 0.0))
+        else:
+            bb_std = np.nan
+        values['Volatility'] = bb_std
+        values['BB_Upper'] = values['MA_20'] + bb_std * 2
+        values['BB_Lower'] = values['MA_20'] - bb_std * 2
+        
+        if self.count >= RSI_WINDOW:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rs = np.float64(self.gain_sum) / np.float64(self.loss_sum)
+                values['RSI'] = float(100 - (100 / (1 + rs)))
+        else:
+            values['RSI'] = np.nan
+        
+        values['MACD'] = self.fast.value - self.slow.value
+        values['Signal'] = self.signal.value
+        
+        if self.count >= VOLUME_WINDOW:
+            values['Volume_MA'] = self.volume_sum / VOLUME_WINDOW
+            values['Volume_Ratio'] = self.volumes[-1] / values['Volume_MA']
+        else:
+            values['Volume_MA'] = np.nan
+            values['Volume_Ratio'] = np.nan
+        
+        return values
+    
+    @classmethod
+    def from_history(cls, close, volume=None):
+        """Build the state for a full history with vectorized operations"""
+        close = np.asarray(close, dtype=np.float64)
+        volume = np.full(len(close), np.nan) if volume is None else np.asarray(volume, dtype=np.float64)
+        state = cls()
+        if len(close) == 0:
+            return state
+        
+        state.count = len(close)
+        state.first_close = float(close[0])
+        state.closes.extend(close[-state.closes.maxlen:].tolist())
+        state.volumes.extend(volume[-VOLUME_WINDOW:].tolist())
+        
+        delta = np.diff(close[-(RSI_WINDOW + 1):])
+        if len(close) <= RSI_WINDOW:
+            # The first bar contributes a zero change
+            delta = np.concatenate([[0.0], delta])
+        state.gains.extend(np.where(delta > 0, delta, 0.0).tolist())
+        state.losses.extend(np.where(delta < 0, -delta, 0.0).tolist())
+        state._resync()
+        
+        # EWM accumulators are restored from the vectorized means over the whole history
+        close_series = pd.Series(close)
+        fast = close_series.ewm(span=MACD_SPANS[0]).mean()
+        slow = close_series.ewm(span=MACD_SPANS[1]).mean()
+        macd = fast - slow
+        state.fast.seed(fast.iloc[-1], state.count)
+        state.slow.seed(slow.iloc[-1], state.count)
+        state.signal.seed(macd.ewm(span=SIGNAL_SPAN).mean().iloc[-1], state.count)
+        return state
+
+def latest_indicators(close, volume=None):
+    """Latest indicator values for a history without computing full rolling series"""
+    return IndicatorState.from_history(close, volume).snapshot()
+
+def technical_summary(values, current_price):
+    """Format indicator values as returned by the prediction models"""
+    return {
+        'rsi': round(values['RSI'], 2),
+        'ma_20': round(values['MA_20'], 2),
+        'ma_50': round(values['MA_50'], 2),
+        'bb_upper': round(values['BB_Upper'], 2),
+        'bb_lower': round(values['BB_Lower'], 2),
+        'macd': round(values['MACD'], 2),
+        'signal': round(values['Signal'], 2),
+        'current_price': round(float(current_price), 2)
+    }
+
+class IndicatorEngine:
+    """Per-symbol indicator state shared across requests
+    
+    When a symbol's history grows by new bars, only those bars are fed into its
+    running state; anything else (first use, rewritten history) triggers a
+    vectorized backfill.
+    """
+    def __init__(self):
+        self._states = {}
+        self._lock = threading.Lock()
+    
+    def latest(self, stock_symbol, close, volume=None):
+        """Latest indicator values for a symbol's current history"""
+        key = stock_symbol.upper()
+        with self._lock:
+            state = self._states.get(key)
+            if state is None or not state.continues(close):
+                state = IndicatorState.from_history(close, volume)
+            else:
+                for i in range(state.count, len(close)):
+                    state.update(close[i], np.nan if volume is None else volume[i])
+            self._states[key] = state
+            return state.snapshot()
+    
+    def append(self, stock_symbol, close, volume=np.nan):
+        """Feed one new bar into a symbol's running state"""
+        with self._lock:
+            state = self._states.setdefault(stock_symbol.upper(), IndicatorState())
+            state.update(close, volume)
+            return state.snapshot()
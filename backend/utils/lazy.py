@@ -0,0 +1,28 @@
+import threading
+
+class LazyProxy:
+    """Stand-in for a service that is only built on first attribute access
+    
+    Lets app.py declare module-level services whose imports are expensive
+    (pandas, plotly, scikit-learn, TensorFlow) without paying for them until a
+    request actually uses one. Building is done once, under a lock.
+    """
+    def __init__(self, factory):
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+    
+    def resolve(self):
+        """Build the wrapped object if needed and return it"""
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+        return self._instance
+    
+    @property
+    def is_resolved(self):
+        return self._instance is not None
+    
+    def __getattr__(self, name):
+        return getattr(self.resolve(), name)
@@ -0,0 +1,24 @@
+from sqlalchemy import inspect
+
+def ensure_indexes(db):
+    """Create the indexes declared on the models that the database is missing
+    
+    db.create_all() only creates indexes together with new tables, so indexes
+    added to existing tables are created here. Safe to run on every start;
+    returns the names of the indexes it created.
+    """
+    inspector = inspect(db.engine)
+    created = []
+    for table in db.metadata.sorted_tables:
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                # checkfirst guards against another worker creating it meanwhile
+                index.create(bind=db.engine, checkfirst=True)
+                created.append(index.name)
+    return created
+
+def migrate(db):
+    """Bring the schema up to date: new tables first, then missing indexes"""
+    db.create_all()
+    return ensure_indexes(db)
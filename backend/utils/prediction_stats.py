@@ -0,0 +1,119 @@
+class PredictionStats:
+    """Prediction counts and error sums kept in small summary tables
+    
+    summary_model has one row per user with prediction_count, resolved_count
+    (predictions with an actual price) and error_sum (sum of the relative
+    errors of the resolved ones). accuracy_model has one row per (stock_symbol,
+    model_used) with resolved_count and error_sum. Writers update them in the
+    same transaction as the predictions, so reads never scan the prediction table.
+    """
+    def __init__(self, db, prediction_model, summary_model, accuracy_model):
+        self.db = db
+        self.prediction_model = prediction_model
+        self.summary_model = summary_model
+        self.accuracy_model = accuracy_model
+    
+    def record_created(self, user_ids):
+        """Count new predictions, given the user_id of each; call before committing them"""
+        counts = {}
+        for user_id in user_ids:
+            counts[user_id] = counts.get(user_id, 0) + 1
+        for user_id, count in counts.items():
+            self._bump(user_id, predictions=count)
+    
+    def record_resolved(self, user_id, stock_symbol, model_used, resolved, error_sum):
+        """Add predictions that just got an actual price; call before committing them"""
+        self._bump(user_id, resolved=resolved, error_sum=error_sum)
+        
+        accuracy = self.accuracy_model
+        result = self.db.session.execute(
+            self.db.update(accuracy).where(
+                accuracy.stock_symbol == stock_symbol, accuracy.model_used == model_used
+            ).values(
+                resolved_count=accuracy.resolved_count + resolved,
+                error_sum=accuracy.error_sum + error_sum
+            )
+        )
+        if result.rowcount == 0:
+            self.db.session.add(accuracy(stock_symbol=stock_symbol, model_used=model_used,
+                                         resolved_count=resolved, error_sum=error_sum))
+    
+    def _bump(self, user_id, predictions=0, resolved=0, error_sum=0.0):
+        summary = self.summary_model
+        result = self.db.session.execute(
+            self.db.update(summary).where(summary.user_id == user_id).values(
+                prediction_count=summary.prediction_count + predictions,
+                resolved_count=summary.resolved_count + resolved,
+                error_sum=summary.error_sum + error_sum
+            )
+        )
+        if result.rowcount == 0:
+            self.db.session.add(summary(user_id=user_id, prediction_count=predictions,
+                                        resolved_count=resolved, error_sum=error_sum))
+    
+    def rebuild(self):
+        """Recompute every summary row from the prediction table with GROUP BY queries"""
+        prediction = self.prediction_model
+        relative_error = self.db.func.abs(prediction.predicted_price - prediction.actual_price) / prediction.actual_price
+        error_sum = self.db.func.coalesce(self.db.func.sum(relative_error), 0.0)
+        
+        users = self.db.session.query(
+            prediction.user_id,
+            self.db.func.count(prediction.id),
+            self.db.func.count(prediction.actual_price),
+            error_sum
+        ).group_by(prediction.user_id).all()
+        models = self.db.session.query(
+            prediction.stock_symbol,
+            prediction.model_used,
+            self.db.func.count(prediction.actual_price),
+            error_sum
+        ).filter(prediction.actual_price.isnot(None)).group_by(prediction.stock_symbol, prediction.model_used).all()
+        
+        self.db.session.query(self.summary_model).delete()
+        self.db.session.query(self.accuracy_model).delete()
+        self.db.session.add_all([
+            self.summary_model(user_id=user_id, prediction_count=count, resolved_count=resolved,
+                               error_sum=float(errors))
+            for user_id, count, resolved, errors in users
+        ])
+        self.db.session.add_all([
+            self.accuracy_model(stock_symbol=stock_symbol, model_used=model_used, resolved_count=resolved,
+                                error_sum=float(errors))
+            for stock_symbol, model_used, resolved, errors in models
+        ])
+        self.db.session.commit()
+    
+    def ensure_built(self):
+        """Build the summaries when they are empty but predictions exist (first run after upgrading)"""
+        if self.db.session.query(self.summary_model.user_id).first() is None and \
+                self.db.session.query(self.prediction_model.id).first() is not None:
+            self.rebuild()
+    
+    def totals(self):
+        """(total predictions, average relative error of resolved predictions)"""
+        summary = self.summary_model
+        count, resolved, error_sum = self.db.session.query(
+            self.db.func.coalesce(self.db.func.sum(summary.prediction_count), 0),
+            self.db.func.coalesce(self.db.func.sum(summary.resolved_count), 0),
+            self.db.func.coalesce(self.db.func.sum(summary.error_sum), 0.0)
+        ).one()
+        return int(count), (error_sum / resolved if resolved else 0)
+    
+    def user_totals(self, user_id):
+        """(predictions, resolved predictions, average relative error of the resolved ones) of one user"""
+        row = self.db.session.get(self.summary_model, user_id)
+        if row is None:
+            return 0, 0, 0
+        return row.prediction_count, row.resolved_count, (row.error_sum / row.resolved_count if row.resolved_count else 0)
+    
+    def accuracy_by_model(self):
+        """Average relative error per (stock_symbol, model_used) over resolved predictions"""
+        rows = self.db.session.query(self.accuracy_model).filter(self.accuracy_model.resolved_count > 0).order_by(
+            self.accuracy_model.stock_symbol, self.accuracy_model.model_used).all()
+        return [{
+            'stock_symbol': row.stock_symbol,
+            'model_used': row.model_used,
+            'resolved_count': row.resolved_count,
+            'average_error': row.error_sum / row.resolved_count
+        } for row in rows]
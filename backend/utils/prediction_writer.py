@@ -0,0 +1,235 @@
+import atexit
+import itertools
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+class PredictionWriter:
+    """Write-behind buffer that inserts Prediction rows in batched commits
+    
+    Request handlers hand over plain column dicts and return without waiting
+    for the database. A background thread inserts everything buffered with a
+    single bulk INSERT and commit once batch_size rows are waiting or every
+    flush_interval seconds. With write_behind=False rows are written in the
+    caller's transaction instead.
+    
+    The buffer holds at most max_pending rows; add() then blocks for up to
+    block_timeout seconds and after that writes the rows itself. A batch that
+    cannot be written is appended to a journal and replayed once the
+    database accepts writes again, and whatever is buffered at shutdown is
+    flushed (or journaled) before the process exits.
+    
+    Each process appends to its own journal, journal_path suffixed with its pid.
+    Replay first renames a journal to a name private to the replaying process,
+    so rows are never read by two processes or lost to another's cleanup;
+    journals left by processes that are no longer running are replayed too.
+    """
+    def __init__(self, app, db, prediction_model, stats, batch_size=200, flush_interval=0.05, write_behind=True,
+                 max_pending=10000, block_timeout=5.0, journal_path=None, replay_interval=30.0):
+        self.app = app
+        self.db = db
+        self.prediction_model = prediction_model
+        self.stats = stats
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.write_behind = write_behind
+        self.max_pending = max_pending
+        self.block_timeout = block_timeout
+        self.journal_path = journal_path
+        self.replay_interval = replay_interval
+        self._buffer = []
+        self._inflight = []
+        self._lock = threading.Lock()
+        self._space = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._replay_needed = True
+        self._next_replay = 0.0
+        self._claims = itertools.count()
+    
+    def add(self, rows):
+        """Queue prediction rows (dicts of column values) for insertion"""
+        if not rows:
+            return
+        if not self.write_behind:
+            self.write(rows)
+            return
+        
+        with self._lock:
+            # Backpressure: wait for the writer to make room, then give up and write inline
+            has_room = self._space.wait_for(
+                lambda: not self._buffer or len(self._buffer) + len(rows) <= self.max_pending,
+                self.block_timeout
+            )
+            if has_room:
+                self._buffer.extend(rows)
+                full = len(self._buffer) >= self.batch_size
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._loop, name='prediction-writer', daemon=True)
+                    self._thread.start()
+                    atexit.register(self.close)
+        if not has_room:
+            self.write(rows)
+        elif full:
+            self._wake.set()
+    
+    def pending(self, user_id):
+        """Rows of user_id that are buffered or being written but not committed yet, oldest first"""
+        with self._lock:
+            return [dict(row) for row in self._inflight + self._buffer if row['user_id'] == user_id]
+    
+    def write(self, rows):
+        """Insert rows and count them in the summary in one transaction of the current session"""
+        self.db.session.execute(self.db.insert(self.prediction_model), rows)
+        self.stats.record_created([row['user_id'] for row in rows])
+        self.db.session.commit()
+    
+    def flush(self):
+        """Write everything buffered now; returns the number of rows written"""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._buffer = self._buffer, []
+                self._inflight = rows
+                self._space.notify_all()
+            if not rows:
+                return 0
+            
+            with self.app.app_context():
+                try:
+                    self.write(rows)
+                except Exception as e:
+                    self.db.session.rollback()
+                    print(f"Warning: writing {len(rows)} predictions failed: {e}")
+                    self._retry_later(rows)
+                    return 0
+                finally:
+                    with self._lock:
+                        self._inflight = []
+            return len(rows)
+    
+    def replay_journal(self):
+        """Write the rows journaled during a database outage; returns the number written"""
+        if not self.journal_path:
+            return 0
+        with self._flush_lock:
+            paths = self._claim_journals()
+            if not paths:
+                self._replay_needed = False
+                return 0
+            rows = []
+            for path in paths:
+                with open(path, encoding='utf-8') as f:
+                    rows.extend(json.loads(line) for line in f if line.strip())
+            for row in rows:
+                row['prediction_date'] = datetime.fromisoformat(row['prediction_date'])
+            
+            with self.app.app_context():
+                try:
+                    if rows:
+                        self.write(rows)
+                except Exception as e:
+                    self.db.session.rollback()
+                    print(f"Warning: replaying {len(rows)} journaled predictions failed: {e}")
+                    self._next_replay = time.monotonic() + self.replay_interval
+                    return 0
+            # A crash between the commit and this removal replays the rows again
+            for path in paths:
+                os.remove(path)
+            self._replay_needed = False
+            return len(rows)
+    
+    def close(self):
+        """Stop the background thread and write out everything still buffered"""
+        self._stop.set()
+        self._wake.set()
+        self.flush()
+    
+    def _journal(self):
+        """This process's journal file"""
+        return f"{self.journal_path}.{os.getpid()}"
+    
+    def _claim_journals(self):
+        """Rename the journals this process should replay to private names and return those
+        
+        Covers this process's journal, journals it claimed before but could not
+        write yet, and journals of processes that have exited. A journal another
+        process renames first is left to that process.
+        """
+        directory = os.path.dirname(self.journal_path) or '.'
+        prefix = os.path.basename(self.journal_path)
+        if not os.path.isdir(directory):
+            return []
+        pid = os.getpid()
+        claimed = []
+        for name in sorted(os.listdir(directory)):
+            if name != prefix and not name.startswith(prefix + '.'):
+                continue
+            parts = name[len(prefix):].split('.')
+            if name == prefix:
+                # Journal written before journals were kept per process
+                owner = None
+            elif len(parts) >= 2 and parts[1].isdigit():
+                owner = int(parts[1])
+            else:
+                continue
+            path = os.path.join(directory, name)
+            if owner == pid and len(parts) > 2:
+                claimed.append(path)
+                continue
+            if owner is not None and owner != pid and _process_alive(owner):
+                continue
+            
+            private = f"{self.journal_path}.{pid}.claimed-{next(self._claims)}"
+            try:
+                os.replace(path, private)
+            except FileNotFoundError:
+                # Claimed by another process in the meantime
+                continue
+            claimed.append(private)
+        return claimed
+    
+    def _retry_later(self, rows):
+        if not self.journal_path:
+            # Keep the rows, ahead of newer ones, for the next attempt
+            with self._lock:
+                self._buffer[:0] = rows
+            return
+        
+        # Spill to disk so the buffer stays bounded while the database is down
+        with open(self._journal(), 'a', encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps(dict(row, prediction_date=row['prediction_date'].isoformat())) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self._replay_needed = True
+    
+    def _loop(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                written = self.flush()
+                # Replay once a write went through, or retry now and then while idle
+                if self._replay_needed and (written or time.monotonic() >= self._next_replay):
+                    self.replay_journal()
+            except Exception as e:
+                # Keep the thread alive; the journal or the next round picks the rows up
+                print(f"Warning: prediction writer round failed: {e}")
+                self._next_replay = time.monotonic() + self.replay_interval
+
+def _process_alive(pid):
+    """Whether a process with this pid is running; assumed so where that cannot be checked"""
+    if os.name == 'nt':
+        # os.kill would terminate the process on Windows
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
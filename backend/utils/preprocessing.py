@@ -0,0 +1,69 @@
+import numpy as np
+
+class PriceScaler:
+    """Min-max scaling state for a price series, fitted on the training range only
+    
+    fit() records the range of the closes a network is trained on. Everything
+    after that range (the validation split, new bars, serving requests) is only
+    transformed, so it never shifts the scale the metrics are computed on;
+    closes outside the range map outside [0, 1]. window() scales just the last
+    lookback closes, so each prediction costs O(lookback) however long the
+    history is. The state is three numbers and is saved with the model.
+    """
+    def __init__(self):
+        self.low = None
+        self.high = None
+        self.rows = 0
+    
+    @classmethod
+    def from_minmax(cls, scaler):
+        """State of a fitted sklearn MinMaxScaler, as saved with older models"""
+        instance = cls()
+        instance.low = float(scaler.data_min_[0])
+        instance.high = float(scaler.data_max_[0])
+        instance.rows = int(scaler.n_samples_seen_)
+        return instance
+    
+    @property
+    def is_fitted(self):
+        return self.low is not None
+    
+    @property
+    def span(self):
+        # A constant series scales by 1, as MinMaxScaler does
+        span = self.high - self.low
+        return span if span > 0 else 1.0
+    
+    def fit(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if values.size == 0:
+            raise ValueError("Cannot fit the price scaler on an empty range")
+        self.low = float(values.min())
+        self.high = float(values.max())
+        self.rows = int(values.size)
+        return self
+    
+    def partial_fit(self, values):
+        """Widen the range to cover values, e.g. bars a model is fine-tuned on"""
+        values = np.asarray(values, dtype=np.float64)
+        if not self.is_fitted:
+            return self.fit(values)
+        self.low = min(self.low, float(values.min()))
+        self.high = max(self.high, float(values.max()))
+        self.rows += int(values.size)
+        return self
+    
+    def transform(self, values):
+        if not self.is_fitted:
+            raise ValueError("Price scaler is not fitted")
+        return (np.asarray(values, dtype=np.float64) - self.low) / self.span
+    
+    def inverse_transform(self, values):
+        return np.asarray(values, dtype=np.float64) * self.span + self.low
+    
+    def window(self, close, lookback):
+        """The last lookback closes, scaled and shaped (1, lookback, 1) for the network"""
+        tail = np.asarray(close[-lookback:], dtype=np.float64)
+        if len(tail) < lookback:
+            raise ValueError(f"Insufficient data. Need {lookback} values, got {len(tail)}")
+        return self.transform(tail).reshape(1, lookback, 1)
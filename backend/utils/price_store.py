@@ -0,0 +1,205 @@
+import os
+import threading
+import pandas as pd
+import numpy as np
+from utils.binary_store import BinarySeriesFile, BINARY_SUFFIX, CSV_SUFFIX, convert_csv, is_stale
+
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close']
+
+class PriceSeries:
+    """Read-only columnar OHLCV history for one symbol"""
+    def __init__(self, stock_symbol, version, dates, ohlc, volume):
+        self.stock_symbol = stock_symbol
+        self.version = version
+        self.dates = dates
+        self.ohlc = ohlc
+        self.volume = volume
+        for array in (self.dates, self.ohlc, self.volume):
+            array.flags.writeable = False
+        self._frame = None
+        self._derived = {}
+    
+    def __len__(self):
+        return len(self.dates)
+    
+    @property
+    def open(self):
+        return self.ohlc[0]
+    
+    @property
+    def high(self):
+        return self.ohlc[1]
+    
+    @property
+    def low(self):
+        return self.ohlc[2]
+    
+    @property
+    def close(self):
+        return self.ohlc[3]
+    
+    @property
+    def frame(self):
+        """DataFrame view over the arrays, built once and shared without copying
+        
+        The columns are read-only; callers that need to add columns must copy it.
+        """
+        if self._frame is None:
+            self._frame = pd.DataFrame({
+                'Date': self.dates,
+                'Open': self.open,
+                'High': self.high,
+                'Low': self.low,
+                'Close': self.close,
+                'Volume': self.volume
+            }, copy=False)
+        return self._frame
+    
+    def cached(self, name, build):
+        """Value derived from this series, built once by build() and then reused
+        
+        A series never changes, so derived data lives exactly as long as its version.
+        """
+        if name not in self._derived:
+            self._derived[name] = build()
+        return self._derived[name]
+
+class PriceStore:
+    """Process-wide cache of price history, reloaded only when a data file changes
+    
+    Each symbol is parsed once into contiguous NumPy arrays. A background watcher
+    polls file modification times so that serving a request never touches disk
+    for a symbol that is already loaded.
+    
+    Symbols with a binary file are mapped from it, but the CSV remains the
+    source of truth: bars appended to the CSV rebuild the binary file on the
+    next lookup or poll.
+    """
+    def __init__(self, data_path='data/'):
+        self.data_path = data_path
+        self._series = {}
+        self._lock = threading.Lock()
+        self._convert_lock = threading.Lock()
+        self._watcher = None
+        self._stop = threading.Event()
+        self._listeners = []
+    
+    def file_path(self, stock_symbol):
+        """Binary data file for a symbol if one exists, otherwise its CSV
+        
+        A binary file older than its CSV is rebuilt from the CSV first; if that
+        fails, the CSV is used.
+        """
+        binary_path = f"{self.data_path}{stock_symbol.lower()}{BINARY_SUFFIX}"
+        csv_path = f"{self.data_path}{stock_symbol.lower()}{CSV_SUFFIX}"
+        if not os.path.exists(binary_path):
+            return csv_path
+        
+        if is_stale(binary_path, csv_path):
+            with self._convert_lock:
+                try:
+                    # Another thread may have rebuilt it while this one waited
+                    if is_stale(binary_path, csv_path):
+                        convert_csv(csv_path, binary_path, stock_symbol)
+                except Exception as e:
+                    print(f"Warning: could not rebuild {binary_path}: {e}")
+                    return csv_path
+        return binary_path
+    
+    def get(self, stock_symbol):
+        """Return the PriceSeries for a symbol, or None if there is no data for it"""
+        series = self._series.get(stock_symbol.lower())
+        if series is not None:
+            return series
+        
+        if not os.path.exists(self.file_path(stock_symbol)):
+            return None
+        return self.reload(stock_symbol)
+    
+    def reload(self, stock_symbol):
+        """Parse a symbol's data file and replace the cached series"""
+        file_path = self.file_path(stock_symbol)
+        with self._lock:
+            stat = os.stat(file_path)
+            version = self._version(stat)
+            current = self._series.get(stock_symbol.lower())
+            if current is not None and current.version == version:
+                return current
+            
+            if file_path.endswith(BINARY_SUFFIX):
+                # Binary files are already columnar, so map them instead of parsing
+                series_file = BinarySeriesFile(file_path)
+                series = PriceSeries(stock_symbol.upper(), version, series_file.dates,
+                                     series_file.ohlc, series_file.volume)
+            else:
+                df = pd.read_csv(file_path, parse_dates=['Date'])
+                df = df.sort_values('Date', kind='stable')
+                
+                series = PriceSeries(
+                    stock_symbol.upper(),
+                    version,
+                    np.ascontiguousarray(df['Date'].values, dtype='datetime64[ns]'),
+                    np.ascontiguousarray(df[PRICE_COLUMNS].values.T, dtype=np.float64),
+                    np.ascontiguousarray(df['Volume'].values, dtype=np.int64)
+                )
+            self._series[stock_symbol.lower()] = series
+            return series
+    
+    def load_all(self):
+        """Load every data file found in data_path"""
+        if not os.path.isdir(self.data_path):
+            return []
+        symbols = set()
+        for name in os.listdir(self.data_path):
+            for suffix in (BINARY_SUFFIX, CSV_SUFFIX):
+                if name.endswith(suffix):
+                    symbols.add(name[:-len(suffix)])
+        for stock_symbol in symbols:
+            self.reload(stock_symbol)
+        return sorted(symbols)
+    
+    def add_listener(self, callback):
+        """Call callback(symbols) with the symbols whose data changed on each refresh"""
+        self._listeners.append(callback)
+    
+    def refresh(self):
+        """Reload symbols whose data file changed since it was loaded"""
+        changed = []
+        for key, series in list(self._series.items()):
+            try:
+                stat = os.stat(self.file_path(key))
+            except FileNotFoundError:
+                continue
+            if self._version(stat) != series.version:
+                self.reload(key)
+                changed.append(key)
+        
+        if changed:
+            for callback in self._listeners:
+                try:
+                    callback(changed)
+                except Exception as e:
+                    print(f"Warning: price store listener failed: {e}")
+        return changed
+    
+    def start_watcher(self, interval=5.0):
+        """Poll data files for changes in a daemon thread"""
+        if self._watcher is not None:
+            return
+        
+        def watch():
+            while not self._stop.wait(interval):
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"Warning: price store refresh failed: {e}")
+        
+        self._watcher = threading.Thread(target=watch, name='price-store-watcher', daemon=True)
+        self._watcher.start()
+    
+    def stop_watcher(self):
+        self._stop.set()
+    
+    @staticmethod
+    def _version(stat):
+        return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
@@ -0,0 +1,31 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    # Installed with scikit-learn; caps BLAS pools that are already loaded
+    from threadpoolctl import threadpool_limits
+except ImportError:
+    threadpool_limits = None
+
+_thread_limits = None
+
+def _limit_threads(threads):
+    global _thread_limits
+    # Read by the math libraries and TensorFlow when they are first imported
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+    os.environ['TF_NUM_INTRAOP_THREADS'] = str(threads)
+    os.environ['TF_NUM_INTEROP_THREADS'] = '1'
+    if threadpool_limits is not None:
+        _thread_limits = threadpool_limits(limits=threads)
+
+def worker_pool(processes, threads_per_worker=1):
+    """Process pool for CPU-bound model work, within a CPU budget
+    
+    Workers are spawned rather than forked because the parent may already hold
+    TensorFlow and its threads. Each worker caps its BLAS/OpenMP and TensorFlow
+    thread pools at threads_per_worker, so processes * threads_per_worker
+    threads run at most.
+    """
+    return ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn'),
+                               initializer=_limit_threads, initargs=(threads_per_worker,))
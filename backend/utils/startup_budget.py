@@ -0,0 +1,66 @@
+"""Check that importing the API stays within its startup budget
+
+Imports app.py in a fresh interpreter, the way a gunicorn worker boots, and
+reports the import time, peak memory and which heavy libraries were loaded:
+
+    python -m utils.startup_budget
+    python -m utils.startup_budget --max-seconds 1.0 --max-mb 100
+
+Exits non-zero when the import is over budget or pulls in any of the
+libraries that should only load on first use.
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+HEAVY_MODULES = ('tensorflow', 'keras', 'sklearn', 'plotly', 'pandas')
+
+# Runs inside the child interpreter; prints one JSON line with the measurements
+PROBE = """
+import json, sys, time, resource
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+# ru_maxrss is in kilobytes on Linux and in bytes on macOS
+peak_mb = peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+loaded = [name for name in %r if name in sys.modules]
+print(json.dumps({'seconds': elapsed, 'peak_mb': peak_mb, 'heavy_modules': loaded}))
+"""
+
+def measure(backend_dir):
+    """Import app in a child process and return its measurements"""
+    env = dict(os.environ)
+    env.pop('PREWARM', None)
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE % (HEAVY_MODULES,)],
+        cwd=backend_dir, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure app import time and memory against a budget")
+    parser.add_argument('--max-seconds', type=float, default=1.0, help="import time budget")
+    parser.add_argument('--max-mb', type=float, default=100, help="peak resident memory budget")
+    parser.add_argument('--backend-dir', default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    args = parser.parse_args(argv)
+    
+    stats = measure(args.backend_dir)
+    print(f"import app: {stats['seconds']:.2f}s, peak {stats['peak_mb']:.0f} MB")
+    
+    failures = []
+    if stats['seconds'] > args.max_seconds:
+        failures.append(f"import took {stats['seconds']:.2f}s (budget {args.max_seconds}s)")
+    if stats['peak_mb'] > args.max_mb:
+        failures.append(f"peak memory {stats['peak_mb']:.0f} MB (budget {args.max_mb:.0f} MB)")
+    if stats['heavy_modules']:
+        failures.append(f"loaded at import time: {', '.join(stats['heavy_modules'])}")
+    
+    for failure in failures:
+        print(f"Over budget: {failure}")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
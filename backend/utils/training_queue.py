@@ -0,0 +1,175 @@
+import threading
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+class TrainingQueue:
+    """Runs model training in a local worker pool and records each run as a job row
+    
+    Jobs are stored through job_model (a SQLAlchemy model) so their status survives
+    the request that created them. Requests for a (symbol, model type, data version)
+    that is already queued or running are collapsed onto the existing job.
+    """
+    ACTIVE_STATUSES = ('queued', 'running')
+    
+    def __init__(self, app, db, job_model, registry, data_loader, max_workers=2):
+        self.app = app
+        self.db = db
+        self.job_model = job_model
+        self.registry = registry
+        self.data_loader = data_loader
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='training')
+        self._in_flight = {}
+        self._lock = threading.Lock()
+    
+    def submit(self, stock_symbol, model_type, data_version, user_id=None, train_kwargs=None):
+        """Queue a training run, or return the job already covering the same model"""
+        key = (stock_symbol.upper(), model_type, data_version)
+        with self._lock:
+            job = self._active_job(key)
+            if job:
+                return job
+            
+            job = self.job_model(
+                stock_symbol=key[0],
+                model_type=model_type,
+                data_version=data_version,
+                status='queued',
+                user_id=user_id
+            )
+            self.db.session.add(job)
+            self.db.session.commit()
+            
+            self._in_flight[key] = job.id
+            self.executor.submit(self._run, job.id, key, train_kwargs or {})
+            return job
+    
+    def submit_bulk(self, jobs, user_id=None, processes=None, full=False, train_kwargs=None):
+        """Queue plan() jobs to train together in worker processes; returns their job rows
+        
+        Jobs already queued or running, here or in another worker process, keep
+        their existing job. train_kwargs maps a model type to its keyword arguments for train().
+        """
+        rows = []
+        batch = []
+        with self._lock:
+            for stock_symbol, model_type, data_version in jobs:
+                key = (stock_symbol.upper(), model_type, data_version)
+                active = self._active_job(key)
+                if active:
+                    rows.append(active)
+                    continue
+                job = self.job_model(
+                    stock_symbol=key[0],
+                    model_type=model_type,
+                    data_version=data_version,
+                    status='queued',
+                    user_id=user_id
+                )
+                self.db.session.add(job)
+                rows.append(job)
+                batch.append((job, key))
+            self.db.session.commit()
+            
+            for job, key in batch:
+                self._in_flight[key] = job.id
+            if batch:
+                self.executor.submit(self._run_bulk, [(job.id, key) for job, key in batch], processes, full,
+                                     train_kwargs)
+        return rows
+    
+    def _active_job(self, key):
+        """Return the queued or running job for a (symbol, model type, data version) key, if any"""
+        if key in self._in_flight:
+            return self.db.session.get(self.job_model, self._in_flight[key])
+        
+        # Another worker process may already be training this model
+        return self.job_model.query.filter(
+            self.job_model.stock_symbol == key[0],
+            self.job_model.model_type == key[1],
+            self.job_model.data_version == key[2],
+            self.job_model.status.in_(self.ACTIVE_STATUSES)
+        ).first()
+    
+    def recover(self):
+        """Fail jobs left queued or running by a previous process"""
+        stale = self.job_model.query.filter(self.job_model.status.in_(self.ACTIVE_STATUSES)).all()
+        for job in stale:
+            job.status = 'failed'
+            job.error = 'Interrupted by server restart'
+            job.finished_at = datetime.utcnow()
+        self.db.session.commit()
+        return len(stale)
+    
+    def shutdown(self, wait=True):
+        """Stop accepting jobs and optionally wait for running ones"""
+        self.executor.shutdown(wait=wait)
+    
+    def _run(self, job_id, key, train_kwargs):
+        """Worker entry point: train, persist and record the outcome of one job"""
+        stock_symbol, model_type, data_version = key
+        with self.app.app_context():
+            job = self.db.session.get(self.job_model, job_id)
+            job.status = 'running'
+            job.started_at = datetime.utcnow()
+            self.db.session.commit()
+            
+            try:
+                df = self.data_loader(stock_symbol)
+                self.registry.refresh(stock_symbol, model_type, data_version, df, **train_kwargs)
+                meta = self.registry.metadata(stock_symbol, model_type, data_version) or {}
+                job.metrics = json.dumps(meta.get('metrics', {}))
+                job.status = 'completed'
+            except Exception as e:
+                job.status = 'failed'
+                job.error = str(e)
+            finally:
+                job.finished_at = datetime.utcnow()
+                self.db.session.commit()
+                with self._lock:
+                    self._in_flight.pop(key, None)
+    
+    def _run_bulk(self, batch, processes, full, train_kwargs):
+        """Worker entry point: train a batch in a process pool and record each outcome"""
+        from utils.bulk_training import train_many
+        
+        job_ids = {key: job_id for job_id, key in batch}
+        with self.app.app_context():
+            started_at = datetime.utcnow()
+            for job_id in job_ids.values():
+                job = self.db.session.get(self.job_model, job_id)
+                job.status = 'running'
+                job.started_at = started_at
+            self.db.session.commit()
+            
+            try:
+                results = train_many(self.registry.store_path, list(job_ids), self.data_loader, processes, full,
+                                     train_kwargs)
+                for stock_symbol, model_type, data_version, seconds, error in results:
+                    key = (stock_symbol, model_type, data_version)
+                    job = self.db.session.get(self.job_model, job_ids.pop(key))
+                    if error:
+                        job.status = 'failed'
+                        job.error = error
+                    else:
+                        # The worker process saved the new weights; stop serving the ones held here
+                        self.registry.forget(stock_symbol, model_type)
+                        meta = self.registry.metadata(stock_symbol, model_type, data_version) or {}
+                        job.metrics = json.dumps(meta.get('metrics', {}))
+                        job.status = 'completed'
+                    job.finished_at = datetime.utcnow()
+                    self.db.session.commit()
+                    with self._lock:
+                        self._in_flight.pop(key, None)
+            except Exception as e:
+                self.db.session.rollback()
+                for key, job_id in job_ids.items():
+                    job = self.db.session.get(self.job_model, job_id)
+                    job.status = 'failed'
+                    job.error = str(e)
+                    job.finished_at = datetime.utcnow()
+                self.db.session.commit()
+            finally:
+                with self._lock:
+                    for key in job_ids:
+                        self._in_flight.pop(key, None)
@@ -0,0 +1,44 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+def make_windows(series, lookback):
+    """Build LSTM training windows as a strided view over a 1-D series
+    
+    Returns X shaped (n - lookback, lookback, 1) and y shaped (n - lookback,),
+    where X[i] is series[i:i + lookback] and y[i] is series[i + lookback].
+    Neither array copies the data.
+    """
+    series = np.asarray(series).reshape(-1)
+    if len(series) <= lookback:
+        raise ValueError(f"Insufficient data. Need more than {lookback} values, got {len(series)}")
+    
+    X = sliding_window_view(series[:-1], lookback)[:, :, np.newaxis]
+    y = series[lookback:]
+    return X, y
+
+def window_dataset(series, lookback, start, stop, batch_size=32, shuffle=False, cache=False, seed=None):
+    """tf.data pipeline over the windows start .. stop - 1 of a 1-D series
+    
+    Window i is series[i:i + lookback] with target series[i + lookback], as in
+    make_windows. The series is held once as a tensor and each batch of windows
+    is gathered inside the pipeline, so the (n, lookback, 1) array is never
+    built; batches are prefetched while the previous one trains. cache keeps
+    the gathered batches after the first pass, for small sets such as the
+    validation split that are read every epoch.
+    """
+    import tensorflow as tf
+    
+    values = tf.constant(np.asarray(series, dtype=np.float32).reshape(-1))
+    offsets = tf.range(lookback, dtype=tf.int64)
+    
+    def gather(indices):
+        windows = tf.gather(values, indices[:, None] + offsets)
+        return windows[:, :, None], tf.gather(values, indices + lookback)
+    
+    dataset = tf.data.Dataset.range(start, stop)
+    if shuffle:
+        dataset = dataset.shuffle(stop - start, seed=seed, reshuffle_each_iteration=True)
+    dataset = dataset.batch(batch_size).map(gather, num_parallel_calls=tf.data.AUTOTUNE)
+    if cache:
+        dataset = dataset.cache()
+    return dataset.prefetch(tf.data.AUTOTUNE)
@@ -29,7 +29,7 @@ const AdminDashboard = () => {
       const [statsResponse, usersResponse, predictionsResponse] = await Promise.all([
         stockAPI.getStats(),
         adminAPI.getUsers(),
-        adminAPI.getAllPredictions()
+        adminAPI.getAllPredictions({ limit: 10 })
       ]);
       
       setStats(statsResponse.data);
@@ -59,32 +59,27 @@ const AdminDashboard = () => {
   };
 
   const getPredictionAccuracy = () => {
-    const completedPredictions = predictions.filter(p => p.actual_price);
-    if (completedPredictions.length === 0) return 0;
-    
-    const accuratePredictions = completedPredictions.filter(p => {
-      const difference = Math.abs(p.predicted_price - p.actual_price) / p.actual_price;
-      return difference <= 0.05; // 5% accuracy threshold
-    });
-    
-    return (accuratePredictions.length / completedPredictions.length * 100).toFixed(1);
+    // 100% minus the mean relative error over every resolved prediction
+    if (!stats || !stats.accuracy_by_model.length) return 0;
+    return ((1 - stats.average_accuracy) * 100).toFixed(1);
   };
 
   const getTopPerformingStocks = () => {
+    // Per-stock totals over every resolved prediction, from the stats summary
     const stockStats = {};
-    predictions.forEach(pred => {
-      if (!stockStats[pred.stock_symbol]) {
-        stockStats[pred.stock_symbol] = { count: 0, totalConfidence: 0 };
+    (stats?.accuracy_by_model || []).forEach(row => {
+      if (!stockStats[row.stock_symbol]) {
+        stockStats[row.stock_symbol] = { count: 0, errorSum: 0 };
       }
-      stockStats[pred.stock_symbol].count++;
-      stockStats[pred.stock_symbol].totalConfidence += pred.confidence_score;
+      stockStats[row.stock_symbol].count += row.resolved_count;
+      stockStats[row.stock_symbol].errorSum += row.average_error * row.resolved_count;
     });
 
     return Object.entries(stockStats)
-      .map(([symbol, stats]) => ({
+      .map(([symbol, totals]) => ({
         symbol,
-        count: stats.count,
-        avgConfidence: (stats.totalConfidence / stats.count * 100).toFixed(1)
+        count: totals.count,
+        avgAccuracy: ((1 - totals.errorSum / totals.count) * 100).toFixed(1)
       }))
       .sort((a, b) => b.count - a.count);
   };
@@ -165,7 +160,7 @@ const AdminDashboard = () => {
                 <FaBrain size={30} className="text-warning" />
               </div>
               <h3 className="fw-bold text-warning">{getPredictionAccuracy()}%</h3>
-              <p className="text-muted mb-0">Accuracy Rate</p>
+              <p className="text-muted mb-0">Avg Accuracy</p>
             </div>
           </div>
         </div>
@@ -246,8 +241,8 @@ const AdminDashboard = () => {
                   </div>
                   <div className="flex-grow-1">
                     <div className="d-flex justify-content-between">
-                      <span className="fw-bold">{stock.count} predictions</span>
-                      <span className="text-muted">{stock.avgConfidence}% avg confidence</span>
+                      <span className="fw-bold">{stock.count} resolved predictions</span>
+                      <span className="text-muted">{stock.avgAccuracy}% avg accuracy</span>
                     </div>
                     <div className="progress mt-1" style={{ height: '4px' }}>
                       <div
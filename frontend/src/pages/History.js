@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import { stockAPI } from '../services/api';
+import { stockAPI, fetchAllPages } from '../services/api';
 import { toast } from 'react-toastify';
 import { 
   FaHistory, 
@@ -13,6 +13,9 @@ import {
 const History = () => {
   const [predictions, setPredictions] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [userStats, setUserStats] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [filter, setFilter] = useState('all');
   const [sortBy, setSortBy] = useState('date');
   const [sortOrder, setSortOrder] = useState('desc');
@@ -23,8 +26,11 @@ const History = () => {
 
   const loadHistory = async () => {
     try {
-      const response = await stockAPI.getHistory();
+      // Totals come from the stats summary; the listing only holds the pages loaded so far
+      const [response, statsResponse] = await Promise.all([stockAPI.getHistory(), stockAPI.getStats()]);
       setPredictions(response.data.history);
+      setNextCursor(response.data.next_cursor);
+      setUserStats(statsResponse.data.user);
     } catch (error) {
       toast.error('Failed to load prediction history');
     } finally {
@@ -32,6 +38,19 @@ const History = () => {
     }
   };
 
+  const loadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const response = await stockAPI.getHistory({ cursor: nextCursor });
+      setPredictions((current) => [...current, ...response.data.history]);
+      setNextCursor(response.data.next_cursor);
+    } catch (error) {
+      toast.error('Failed to load more predictions');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const formatCurrency = (value) => {
     return new Intl.NumberFormat('en-IN', {
       style: 'currency',
@@ -76,7 +95,7 @@ const History = () => {
     }
   };
 
-  const filteredAndSortedPredictions = predictions
+  const filterAndSort = (list) => list
     .filter(prediction => {
       if (filter === 'all') return true;
       if (filter === 'pending') return !prediction.actual_price;
@@ -115,9 +134,24 @@ const History = () => {
       }
     });
 
-  const exportToCSV = () => {
+  const filteredAndSortedPredictions = filterAndSort(predictions);
+
+  const loadedConfidence = predictions.length > 0
+    ? (predictions.reduce((acc, p) => acc + p.confidence_score, 0) / predictions.length * 100).toFixed(1)
+    : 0;
+
+  const exportToCSV = async () => {
+    // Export the whole history, not just the loaded pages
+    let allPredictions;
+    try {
+      allPredictions = await fetchAllPages(stockAPI.getHistory, 'history');
+    } catch (error) {
+      toast.error('Failed to export prediction history');
+      return;
+    }
+    
     const headers = ['Date', 'Stock', 'Predicted Price', 'Actual Price', 'Model', 'Confidence', 'Status'];
-    const csvData = filteredAndSortedPredictions.map(pred => [
+    const csvData = filterAndSort(allPredictions).map(pred => [
       formatDate(pred.prediction_date),
       pred.stock_symbol,
       pred.predicted_price,
@@ -216,7 +250,7 @@ const History = () => {
         <div className="col-md-3">
           <div className="card border-0 shadow-sm">
             <div className="card-body text-center">
-              <h4 className="fw-bold text-primary">{predictions.length}</h4>
+              <h4 className="fw-bold text-primary">{userStats ? userStats.total_predictions : predictions.length}</h4>
               <p className="text-muted mb-0">Total Predictions</p>
             </div>
           </div>
@@ -225,7 +259,7 @@ const History = () => {
           <div className="card border-0 shadow-sm">
             <div className="card-body text-center">
               <h4 className="fw-bold text-success">
-                {predictions.filter(p => p.actual_price).length}
+                {userStats ? userStats.resolved_predictions : predictions.filter(p => p.actual_price).length}
               </h4>
               <p className="text-muted mb-0">Completed</p>
             </div>
@@ -235,7 +269,9 @@ const History = () => {
           <div className="card border-0 shadow-sm">
             <div className="card-body text-center">
               <h4 className="fw-bold text-warning">
-                {predictions.filter(p => !p.actual_price).length}
+                {userStats
+                  ? userStats.total_predictions - userStats.resolved_predictions
+                  : predictions.filter(p => !p.actual_price).length}
               </h4>
               <p className="text-muted mb-0">Pending</p>
             </div>
@@ -245,9 +281,9 @@ const History = () => {
           <div className="card border-0 shadow-sm">
             <div className="card-body text-center">
               <h4 className="fw-bold text-info">
-                {(predictions.reduce((acc, p) => acc + p.confidence_score, 0) / predictions.length * 100).toFixed(1)}%
+                {loadedConfidence}%
               </h4>
-              <p className="text-muted mb-0">Avg Confidence</p>
+              <p className="text-muted mb-0">Avg Confidence (loaded rows)</p>
             </div>
           </div>
         </div>
@@ -260,7 +296,7 @@ const History = () => {
             <div className="card-header bg-primary text-white">
               <h5 className="mb-0">
                 <FaHistory className="me-2" />
-                Prediction History ({filteredAndSortedPredictions.length} results)
+                Prediction History ({filteredAndSortedPredictions.length} of {predictions.length} loaded)
               </h5>
             </div>
             <div className="card-body">
@@ -286,7 +322,7 @@ const History = () => {
                           prediction.actual_price
                         );
                         return (
-                          <tr key={prediction.id}>
+                          <tr key={prediction.id || `pending-${prediction.prediction_date}`}>
                             <td>
                               <small className="text-muted">
                                 {formatDate(prediction.prediction_date)}
@@ -339,6 +375,13 @@ const History = () => {
                       })}
                     </tbody>
                   </table>
+                  {nextCursor && (
+                    <div className="text-center mt-3">
+                      <button className="btn btn-outline-primary" onClick={loadMore} disabled={loadingMore}>
+                        {loadingMore ? 'Loading...' : 'Load more'}
+                      </button>
+                    </div>
+                  )}
                 </div>
               ) : (
                 <div className="text-center py-4">
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { useLocation } from 'react-router-dom';
-import { stockAPI } from '../services/api';
+import { stockAPI, waitForJob } from '../services/api';
 import { toast } from 'react-toastify';
 import Plot from 'react-plotly.js';
 import { 
@@ -39,7 +39,7 @@ const PredictionPage = () => {
 
   const loadCharts = async (stockSymbol) => {
     try {
-      const response = await stockAPI.getCharts(stockSymbol);
+      const response = await stockAPI.getCharts(stockSymbol, { charts: 'line,candlestick,pie,technical' });
       setCharts(response.data);
     } catch (error) {
       toast.error('Failed to load charts');
@@ -49,7 +49,13 @@ const PredictionPage = () => {
   const handlePrediction = async () => {
     setLoading(true);
     try {
-      const response = await stockAPI.predict(selectedStock, selectedModel);
+      let response = await stockAPI.predict(selectedStock, selectedModel);
+      // No trained model yet: wait for the training job, then ask again
+      while (response.status === 202) {
+        toast.info('Training model, this may take a few minutes...');
+        await waitForJob(response.data.job.job_id);
+        response = await stockAPI.predict(selectedStock, selectedModel);
+      }
       setPrediction(response.data);
       toast.success('Prediction completed successfully!');
     } catch (error) {
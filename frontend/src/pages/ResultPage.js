@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import { adminAPI } from '../services/api';
+import { adminAPI, stockAPI, fetchAllPages } from '../services/api';
 import { toast } from 'react-toastify';
 import { 
   FaClipboardList, 
@@ -15,6 +15,9 @@ import {
 
 const ResultPage = () => {
   const [predictions, setPredictions] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [stats, setStats] = useState(null);
   const [loading, setLoading] = useState(true);
   const [searchTerm, setSearchTerm] = useState('');
   const [filterStock, setFilterStock] = useState('all');
@@ -29,8 +32,11 @@ const ResultPage = () => {
 
   const loadPredictions = async () => {
     try {
-      const response = await adminAPI.getAllPredictions();
+      // Totals come from the stats summary; the listing only holds the pages loaded so far
+      const [response, statsResponse] = await Promise.all([adminAPI.getAllPredictions(), stockAPI.getStats()]);
       setPredictions(response.data.predictions);
+      setNextCursor(response.data.next_cursor);
+      setStats(statsResponse.data);
     } catch (error) {
       toast.error('Failed to load predictions');
     } finally {
@@ -38,6 +44,19 @@ const ResultPage = () => {
     }
   };
 
+  const loadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const response = await adminAPI.getAllPredictions({ cursor: nextCursor });
+      setPredictions((current) => [...current, ...response.data.predictions]);
+      setNextCursor(response.data.next_cursor);
+    } catch (error) {
+      toast.error('Failed to load more predictions');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const formatCurrency = (value) => {
     return new Intl.NumberFormat('en-IN', {
       style: 'currency',
@@ -82,7 +101,7 @@ const ResultPage = () => {
     }
   };
 
-  const filteredAndSortedPredictions = predictions
+  const filterAndSort = (list) => list
     .filter(prediction => {
       const matchesSearch = prediction.username.toLowerCase().includes(searchTerm.toLowerCase()) ||
                           prediction.stock_symbol.toLowerCase().includes(searchTerm.toLowerCase());
@@ -129,9 +148,20 @@ const ResultPage = () => {
       }
     });
 
-  const exportToCSV = () => {
+  const filteredAndSortedPredictions = filterAndSort(predictions);
+
+  const exportToCSV = async () => {
+    // Export every prediction, not just the loaded pages
+    let allPredictions;
+    try {
+      allPredictions = await fetchAllPages(adminAPI.getAllPredictions, 'predictions');
+    } catch (error) {
+      toast.error('Failed to export predictions');
+      return;
+    }
+    
     const headers = ['Date', 'User', 'Stock', 'Predicted Price', 'Actual Price', 'Model', 'Confidence', 'Status'];
-    const csvData = filteredAndSortedPredictions.map(pred => [
+    const csvData = filterAndSort(allPredictions).map(pred => [
       formatDate(pred.prediction_date),
       pred.username,
       pred.stock_symbol,
@@ -156,8 +186,12 @@ const ResultPage = () => {
   };
 
   const getAnalytics = () => {
-    const total = predictions.length;
-    const completed = predictions.filter(p => p.actual_price).length;
+    // Total and completed cover every prediction; the rest are over the loaded rows only
+    const total = stats ? stats.total_predictions : predictions.length;
+    const completed = stats
+      ? stats.accuracy_by_model.reduce((acc, row) => acc + row.resolved_count, 0)
+      : predictions.filter(p => p.actual_price).length;
+    const loadedCompleted = predictions.filter(p => p.actual_price).length;
     const accurate = predictions.filter(p => {
       if (!p.actual_price) return false;
       const status = getPredictionStatus(p.predicted_price, p.actual_price);
@@ -168,7 +202,7 @@ const ResultPage = () => {
       ? (predictions.reduce((acc, p) => acc + p.confidence_score, 0) / predictions.length * 100).toFixed(1)
       : 0;
     
-    const accuracyRate = completed > 0 ? (accurate / completed * 100).toFixed(1) : 0;
+    const accuracyRate = loadedCompleted > 0 ? (accurate / loadedCompleted * 100).toFixed(1) : 0;
     
     return { total, completed, accurate, avgConfidence, accuracyRate };
   };
@@ -278,7 +312,7 @@ const ResultPage = () => {
           <div className="card border-0 shadow-sm">
             <div className="card-body text-center">
               <h4 className="fw-bold text-warning">{analytics.accurate}</h4>
-              <p className="text-muted mb-0">Accurate</p>
+              <p className="text-muted mb-0">Accurate (loaded rows)</p>
             </div>
           </div>
         </div>
@@ -286,7 +320,7 @@ const ResultPage = () => {
           <div className="card border-0 shadow-sm">
             <div className="card-body text-center">
               <h4 className="fw-bold text-info">{analytics.accuracyRate}%</h4>
-              <p className="text-muted mb-0">Accuracy</p>
+              <p className="text-muted mb-0">Accuracy (loaded rows)</p>
             </div>
           </div>
         </div>
@@ -294,7 +328,7 @@ const ResultPage = () => {
           <div className="card border-0 shadow-sm">
             <div className="card-body text-center">
               <h4 className="fw-bold text-primary">{analytics.avgConfidence}%</h4>
-              <p className="text-muted mb-0">Avg Confidence</p>
+              <p className="text-muted mb-0">Avg Confidence (loaded rows)</p>
             </div>
           </div>
         </div>
@@ -304,7 +338,7 @@ const ResultPage = () => {
               <h4 className="fw-bold text-secondary">
                 {predictions.filter(p => p.model_used === 'lstm').length}
               </h4>
-              <p className="text-muted mb-0">LSTM Models</p>
+              <p className="text-muted mb-0">LSTM Models (loaded rows)</p>
             </div>
           </div>
         </div>
@@ -317,7 +351,7 @@ const ResultPage = () => {
             <div className="card-header bg-primary text-white">
               <h5 className="mb-0">
                 <FaClipboardList className="me-2" />
-                All Predictions ({filteredAndSortedPredictions.length} results)
+                All Predictions ({filteredAndSortedPredictions.length} of {predictions.length} loaded)
               </h5>
             </div>
             <div className="card-body">
@@ -419,6 +453,13 @@ const ResultPage = () => {
                       })}
                     </tbody>
                   </table>
+                  {nextCursor && (
+                    <div className="text-center mt-3">
+                      <button className="btn btn-outline-primary" onClick={loadMore} disabled={loadingMore}>
+                        {loadingMore ? 'Loading...' : 'Load more'}
+                      </button>
+                    </div>
+                  )}
                 </div>
               ) : (
                 <div className="text-center py-4">
@@ -28,7 +28,7 @@ const UserDashboard = () => {
     try {
       const [statsResponse, historyResponse] = await Promise.all([
         stockAPI.getStats(),
-        stockAPI.getHistory()
+        stockAPI.getHistory({ limit: 5 })
       ]);
       
       setStats(statsResponse.data);
@@ -235,7 +235,7 @@ const UserDashboard = () => {
                           prediction.actual_price
                         );
                         return (
-                          <tr key={prediction.id}>
+                          <tr key={prediction.id || `pending-${prediction.prediction_date}`}>
                             <td>
                               <span className="badge bg-primary">{prediction.stock_symbol}</span>
                             </td>
@@ -43,14 +43,40 @@ export const stockAPI = {
   getStocks: () => api.get('/api/stocks'),
   
   // Make prediction
-  predict: (stockSymbol, modelType = 'lstm') => 
-    api.post('/api/predict', { stock_symbol: stockSymbol, model_type: modelType }),
+  predict: (stockSymbol, modelType = 'lstm', horizon = 1) => 
+    api.post('/api/predict', { stock_symbol: stockSymbol, model_type: modelType, horizon }),
   
-  // Get charts for a stock
-  getCharts: (stockSymbol) => api.get(`/api/charts/${stockSymbol}`),
+  // Make predictions for several (stock, model) pairs at once
+  predictBatch: (items) =>
+    api.post('/api/predict/batch', {
+      items: items.map(({ stockSymbol, modelType = 'lstm' }) => ({ stock_symbol: stockSymbol, model_type: modelType })),
+    }),
+  
+  // Train a model in the background
+  // options: force, max_epochs, max_seconds (LSTM training budgets)
+  train: (stockSymbol, modelType = 'lstm', options = {}) =>
+    api.post('/api/train', { stock_symbol: stockSymbol, model_type: modelType, ...options }),
+  
+  // Get training job status
+  getJob: (jobId) => api.get(`/api/jobs/${jobId}`),
+  
+  // Get charts for a stock; options can set charts (e.g. 'line,pie'), max_points and resolution
+  getCharts: (stockSymbol, options = {}) => api.get(`/api/charts/${stockSymbol}`, { params: options }),
+  
+  // Get a single chart: line, candlestick, pie, technical, volume, statistics or prediction
+  getChart: (stockSymbol, chartType, options = {}) =>
+    api.get(`/api/charts/${stockSymbol}/${chartType}`, { params: options }),
   
   // Get prediction history
-  getHistory: () => api.get('/api/history'),
+  // params: limit, cursor (next_cursor of the previous page), symbol, model, start_date, end_date
+  getHistory: (params = {}) => api.get('/api/history', { params }),
+  
+  // Get stored walk-forward backtests of a stock (optionally { model_type })
+  getBacktests: (stockSymbol, params = {}) => api.get(`/api/backtest/${stockSymbol}`, { params }),
+  
+  // Run a walk-forward backtest
+  // options: model_type, mode (expanding or rolling), folds, min_train, tolerance, epochs, warm_epochs
+  runBacktest: (stockSymbol, options = {}) => api.post(`/api/backtest/${stockSymbol}`, options),
   
   // Get statistics
   getStats: () => api.get('/api/stats'),
@@ -61,8 +87,8 @@ export const adminAPI = {
   // Get all users
   getUsers: () => api.get('/api/admin/users'),
   
-  // Get all predictions
-  getAllPredictions: () => api.get('/api/admin/predictions'),
+  // Get all predictions, one page at a time (same params as getHistory)
+  getAllPredictions: (params = {}) => api.get('/api/admin/predictions', { params }),
   
   // Get user by ID
   getUser: (userId) => api.get(`/api/admin/users/${userId}`),
@@ -90,6 +116,33 @@ export const authAPI = {
 };
 
 // Utility functions
+export const fetchAllPages = async (fetchPage, key, params = {}) => {
+  // Follow next_cursor through a paginated listing and return every row
+  const rows = [];
+  let cursor = null;
+  do {
+    const response = await fetchPage({ ...params, limit: 1000, ...(cursor ? { cursor } : {}) });
+    rows.push(...response.data[key]);
+    cursor = response.data.next_cursor;
+  } while (cursor);
+  return rows;
+};
+
+export const waitForJob = async (jobId, interval = 3000) => {
+  // Poll a training job until it finishes
+  for (;;) {
+    const response = await stockAPI.getJob(jobId);
+    const job = response.data.job;
+    if (job.status === 'completed') {
+      return job;
+    }
+    if (job.status === 'failed') {
+      throw new Error(job.error || 'Model training failed');
+    }
+    await new Promise((resolve) => setTimeout(resolve, interval));
+  }
+};
+
 export const handleAPIError = (error) => {
   if (error.response) {
     // Server responded with error status